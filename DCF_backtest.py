@@ -0,0 +1,248 @@
+"""
+Rolling quarterly revaluation backtest of the DCF signal.
+
+For every rebalance date and ticker, the company inputs (TTM operating income,
+cash, debt, shares outstanding) are taken from the latest statements that
+would have been public by then: each period end plus a reporting lag. The
+price is the close as traded on that date (splits undone, so it matches the
+share counts reported at the time), and forward returns use split- and
+dividend-adjusted closes. Statement amounts are converted from the
+financialCurrency into the trading currency (ADRs such as TSM or NVO report
+in TWD or DKK) at the current rate from the shared FX matrix. This gives a (dates x tickers) panel. Each date is
+valued in one (paths x tickers) computation on common random numbers,
+using the valuation assumptions (growth, WACC, ...) from a base params dict.
+Results go to Parquet, and the prob_undervalued signal is scored against
+forward returns.
+
+yfinance statements cover only the last few years (about 4 annual and 5-8
+quarterly periods). Dates before the first available statement have no
+inputs and are skipped.
+"""
+import argparse
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from DCF_main import SIMULATED_PARAMS, PROJECTION_YEARS, sample_inputs, correlate_normals, value_paths
+from market_data import CachedTicker, get_fx
+from price_store import adjust_dividends, undo_splits, update_histories
+
+# Statement rows per panel field, in order of preference
+STATEMENT_FIELDS = {
+    'operating_income': ['Operating Income', 'EBIT'],
+    'cash': ['Cash And Cash Equivalents', 'Cash Cash Equivalents And Short Term Investments'],
+    'debt': ['Total Debt'],
+    'shares': ['Ordinary Shares Number', 'Share Issued'],
+}
+# Days after the period end before a statement is assumed to be public
+REPORTING_LAG_DAYS = {'quarterly': 45, 'annual': 75}
+FORWARD_HORIZONS = {'3m': 63, '6m': 126, '12m': 252}
+
+
+@lru_cache(maxsize=256)
+def load_history(ticker):
+    """
+    Statements and daily closes for ticker, fetched once per ticker and process.
+    'prices' are closes as traded (splits undone), comparable with the share counts
+    the statements reported at the time; 'total_return_prices' are split- and
+    dividend-adjusted closes for forward returns. 'statement_rate' converts
+    statement amounts into the price currency (NaN if the rate is unavailable,
+    so those rows are left unvalued rather than mispriced).
+    """
+    stock = CachedTicker(ticker)
+    raw = update_histories([ticker])[ticker.upper()]
+    profile = stock.profile
+    currency = profile.get('currency')
+    financial_currency = profile.get('financialCurrency') or currency
+    statement_rate = 1.0
+    if currency and financial_currency != currency:
+        statement_rate = get_fx().rate(financial_currency, currency) or np.nan
+    return {
+        'quarterly_financials': stock.quarterly_financials,
+        'quarterly_balance_sheet': stock.quarterly_balance_sheet,
+        'income_stmt': stock.income_stmt,
+        'balance_sheet': stock.balance_sheet,
+        'prices': undo_splits(raw)['Close'],
+        'total_return_prices': adjust_dividends(raw)['Close'],
+        'statement_rate': statement_rate,
+    }
+
+
+def _statement_row(statement, field):
+    """First available row for a panel field, as a float Series indexed by period end (oldest first)"""
+    if statement is None or statement.empty:
+        return pd.Series(dtype=float)
+    for row in STATEMENT_FIELDS[field]:
+        if row in statement.index:
+            series = pd.to_numeric(statement.loc[row], errors='coerce').dropna()
+            series.index = pd.to_datetime(series.index).tz_localize(None)
+            return series.sort_index()
+    return pd.Series(dtype=float)
+
+
+def _point_in_time(series, lag_days, dates):
+    """Value of `series` known at each date (period end + lag), forward-filled"""
+    if series.empty:
+        return pd.Series(np.nan, index=dates)
+    available = series.copy()
+    available.index = available.index + pd.Timedelta(days=lag_days)
+    return available[~available.index.duplicated(keep='last')].reindex(dates, method='ffill')
+
+
+def _ticker_panel(history, dates):
+    """
+    (dates x fields) point-in-time inputs for one ticker, in millions like fetch_data,
+    with statement amounts in the price currency.
+
+    A DKK reporter trading in USD, at 0.15 USD per DKK:
+
+    >>> statement = lambda rows: pd.DataFrame(rows, index=[pd.Timestamp('2023-12-31')]).T
+    >>> prices = pd.Series(100.0, index=pd.bdate_range('2024-01-02', periods=300))
+    >>> history = {'quarterly_financials': None, 'quarterly_balance_sheet': None,
+    ...            'income_stmt': statement({'Operating Income': 10e9}),
+    ...            'balance_sheet': statement({'Cash And Cash Equivalents': 2e9, 'Total Debt': 1e9,
+    ...                                        'Ordinary Shares Number': 5e8}),
+    ...            'prices': prices, 'statement_rate': 0.15}
+    >>> row = _ticker_panel(history, pd.DatetimeIndex(['2024-06-30'])).iloc[0]
+    >>> [float(round(row[field], 1)) for field in ('operating_income', 'cash', 'debt', 'shares', 'price')]
+    [1500.0, 300.0, 150.0, 500.0, 100.0]
+    """
+    quarterly_lag, annual_lag = REPORTING_LAG_DAYS['quarterly'], REPORTING_LAG_DAYS['annual']
+    columns = {}
+    # TTM operating income from quarters, falling back to the last fiscal year
+    quarterly_income = _statement_row(history['quarterly_financials'], 'operating_income').rolling(4).sum().dropna()
+    annual_income = _statement_row(history['income_stmt'], 'operating_income')
+    columns['operating_income'] = _point_in_time(quarterly_income, quarterly_lag, dates).combine_first(
+        _point_in_time(annual_income, annual_lag, dates))
+    for field in ('cash', 'debt', 'shares'):
+        columns[field] = _point_in_time(_statement_row(history['quarterly_balance_sheet'], field), quarterly_lag, dates).combine_first(
+            _point_in_time(_statement_row(history['balance_sheet'], field), annual_lag, dates))
+    panel = pd.DataFrame(columns, index=dates) / 1e6
+    money = ['operating_income', 'cash', 'debt']
+    panel[money] = panel[money] * history.get('statement_rate', 1.0)
+    prices = history['prices']
+    index = pd.to_datetime(prices.index)
+    index = index.tz_localize(None) if index.tz is not None else index
+    closes = prices.to_numpy(dtype=float)
+    total_return = history.get('total_return_prices', prices).reindex(prices.index).to_numpy(dtype=float)
+    # Last close on or before each date, and the total return `days` trading days later
+    position = index.searchsorted(dates, side='right') - 1
+    known = position >= 0
+    panel['price'] = np.where(known, closes[np.maximum(position, 0)], np.nan)
+    start = np.where(known, total_return[np.maximum(position, 0)], np.nan)
+    for name, days in FORWARD_HORIZONS.items():
+        ahead = position + days
+        future = np.where(known & (ahead < len(closes)), total_return[np.clip(ahead, 0, len(closes) - 1)], np.nan)
+        panel[f'fwd_return_{name}'] = future / start - 1
+    return panel
+
+
+def quarterly_dates(years=10, end=None):
+    """Quarter-end rebalance dates covering the last `years` years"""
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+    return pd.date_range(end=end, periods=4 * years, freq='QE')
+
+
+def build_panel(tickers, dates, loader=load_history):
+    """Long (date, ticker) panel of point-in-time inputs, prices and forward returns"""
+    frames = {ticker: _ticker_panel(loader(ticker), dates) for ticker in tickers}
+    panel = pd.concat(frames, names=['ticker', 'date']).swaplevel().sort_index()
+    return panel
+
+
+def value_panel(panel, base_params, n_paths=10_000, seed=42):
+    """
+    Value every (date, ticker) row with complete inputs. Each date is one
+    (paths x tickers) broadcast over the same sampled assumptions (common random
+    numbers across dates and tickers). Adds mean_value, median_value,
+    prob_undervalued and upside_potential columns.
+    """
+    rng = np.random.default_rng(seed)
+    standard_normals = correlate_normals(base_params, rng.standard_normal((n_paths, len(SIMULATED_PARAMS))))
+    growth_innovations = None
+    if base_params.get('growth_process', 'stage') == 'ar1':
+        growth_innovations = rng.standard_normal((n_paths, len(PROJECTION_YEARS)))
+    draws = {key: np.asarray(value)[:, None] for key, value in sample_inputs(base_params, standard_normals, growth_innovations).items()}
+
+    required = ['operating_income', 'cash', 'debt', 'shares', 'price']
+    valid = panel[required].notna().all(axis=1) & (panel['shares'] > 0) & (panel['operating_income'] > 0)
+    valued = []
+    for date, rows in panel[valid].groupby(level='date'):
+        company = {
+            'operating_income_base': rows['operating_income'].to_numpy()[:, None],
+            'tax_rate': base_params.get('tax_rate', 0.21),
+            'cash': rows['cash'].to_numpy(),
+            'debt': rows['debt'].to_numpy(),
+            'shares_outstanding': rows['shares'].to_numpy(),
+            'dtype': base_params.get('dtype', 'float64'),
+        }
+        values, _ = value_paths(draws, company)
+        price = rows['price'].to_numpy()
+        mean_value = values.mean(axis=0)
+        valued.append(pd.DataFrame({
+            'mean_value': mean_value,
+            'median_value': np.median(values, axis=0),
+            'prob_undervalued': (values > price).mean(axis=0) * 100,
+            'upside_potential': (mean_value - price) / price * 100,
+        }, index=rows.index))
+    columns = ['mean_value', 'median_value', 'prob_undervalued', 'upside_potential']
+    results = panel.join(pd.concat(valued) if valued else pd.DataFrame(columns=columns, dtype=float))
+    return results
+
+
+def hit_rates(results, threshold=50.0):
+    """
+    Score the signal per forward horizon: a row is 'undervalued' when
+    prob_undervalued > threshold. Reports counts, the share of undervalued calls
+    followed by a positive return, the share of overvalued calls followed by a
+    negative one, overall accuracy and the mean return spread between the two.
+    """
+    scored = results.dropna(subset=['prob_undervalued'])
+    undervalued = scored['prob_undervalued'] > threshold
+    rows = {}
+    for name in FORWARD_HORIZONS:
+        forward = scored[f'fwd_return_{name}']
+        known = forward.notna()
+        up, down = undervalued & known, ~undervalued & known
+        rows[name] = {
+            'observations': int(known.sum()),
+            'undervalued_calls': int(up.sum()),
+            'undervalued_hit_rate': (forward[up] > 0).mean() * 100 if up.any() else np.nan,
+            'overvalued_calls': int(down.sum()),
+            'overvalued_hit_rate': (forward[down] < 0).mean() * 100 if down.any() else np.nan,
+            'accuracy': ((forward[known] > 0) == undervalued[known]).mean() * 100 if known.any() else np.nan,
+            'return_spread': (forward[up].mean() - forward[down].mean()) * 100 if up.any() and down.any() else np.nan,
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def run_backtest(tickers, base_params, years=10, n_paths=10_000, output_path=None, loader=load_history):
+    """Build the panel, value it quarterly and return (results, hit_rates); results are written to Parquet if output_path is set"""
+    if loader is load_history:
+        # One bulk update of the price store; load_history then reads each ticker's prices from disk
+        update_histories(tickers)
+    panel = build_panel(tickers, quarterly_dates(years), loader)
+    results = value_panel(panel, base_params, n_paths, base_params.get('seed', 42))
+    if output_path:
+        results.reset_index().to_parquet(output_path, index=False)
+    return results, hit_rates(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quarterly DCF revaluation backtest over a ticker universe")
+    parser.add_argument("params_file", help="JSON file with the base simulation params (valuation assumptions)")
+    parser.add_argument("tickers", nargs='+')
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--output", default="backtest_results.parquet")
+    args = parser.parse_args()
+
+    with open(args.params_file, 'r', encoding='utf-8') as f:
+        base_params = json.load(f)
+    _, report = run_backtest(args.tickers, base_params, args.years, args.paths, args.output)
+    print(report.to_string(float_format=lambda x: f"{x:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
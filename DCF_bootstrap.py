@@ -0,0 +1,115 @@
+"""
+Growth distributions from a company's own history, by block bootstrap.
+
+Year-over-year revenue and operating-income growth are taken from the same
+statements StockAnalyzer reads (annual `income_stmt`, plus TTM growth from
+`quarterly_financials`). Ten-year growth paths are resampled in contiguous
+blocks, drawing the same block for both series so their co-movement is kept.
+Each path is then averaged over years 1-5 and 6-10 to get empirical
+distributions for growth_5y and growth_5_10y. The statements and the resampled
+paths are cached per ticker, so repeated valuations skip both steps.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from DCF_main import PROJECTION_YEARS
+from market_data import CachedTicker
+
+GROWTH_FIELDS = {'revenue': 'Total Revenue', 'operating_income': 'Operating Income'}
+
+
+def _yoy_growth(values, lag):
+    """Growth over `lag` periods, skipping periods whose base is not positive"""
+    base = values.shift(lag)
+    return ((values - base) / base).where(base > 0)
+
+
+def _growth_from_statements(income_stmt, quarterly_financials):
+    """
+    (observations x GROWTH_FIELDS) DataFrame of year-over-year growth, oldest first:
+    annual growth from income_stmt, then TTM-over-TTM growth from the quarters
+    that come after the last fiscal year.
+    """
+    frames = []
+    if income_stmt is not None and not income_stmt.empty:
+        annual = income_stmt.reindex(list(GROWTH_FIELDS.values())).T.sort_index().apply(pd.to_numeric, errors='coerce')
+        frames.append(_yoy_growth(annual, 1))
+    if quarterly_financials is not None and not quarterly_financials.empty:
+        quarterly = quarterly_financials.reindex(list(GROWTH_FIELDS.values())).T.sort_index().apply(pd.to_numeric, errors='coerce')
+        ttm = quarterly.rolling(4).sum()
+        ttm_growth = _yoy_growth(ttm, 4)
+        if frames:
+            ttm_growth = ttm_growth[ttm_growth.index > frames[0].index.max()]
+        frames.append(ttm_growth)
+    if not frames:
+        return pd.DataFrame(columns=list(GROWTH_FIELDS))
+    growth = pd.concat(frames).dropna(how='all')
+    growth.columns = list(GROWTH_FIELDS)
+    return growth
+
+
+@lru_cache(maxsize=128)
+def growth_history(ticker):
+    """Historical growth observations for `ticker` (fetched once per ticker and process)"""
+    stock = CachedTicker(ticker)
+    growth = _growth_from_statements(stock.income_stmt, stock.quarterly_financials)
+    if len(growth) < 2:
+        raise ValueError(f"Not enough income statement history for {ticker} to bootstrap growth")
+    return growth
+
+
+def block_bootstrap(history, n_resamples, horizon=len(PROJECTION_YEARS), block_length=2, rng=None):
+    """
+    Moving-block bootstrap of the rows of `history` (observations x series).
+    Returns an (n_resamples, horizon, series) array built from blocks of
+    block_length consecutive observations, all indices drawn in one call.
+    """
+    history = np.asarray(history, dtype=float)
+    rng = rng if rng is not None else np.random.default_rng()
+    block_length = max(1, min(block_length, len(history)))
+    n_blocks = -(-horizon // block_length)
+    starts = rng.integers(0, len(history) - block_length + 1, size=(n_resamples, n_blocks))
+    index = (starts[..., None] + np.arange(block_length)).reshape(n_resamples, -1)[:, :horizon]
+    return history[index]
+
+
+@lru_cache(maxsize=128)
+def bootstrap_growth_paths(ticker, n_resamples=10_000, block_length=2, seed=42):
+    """
+    Cached (n_resamples, years, len(GROWTH_FIELDS)) resampled growth paths for `ticker`.
+    Missing observations are filled with the series' historical median first.
+    """
+    history = growth_history(ticker)
+    history = history.fillna(history.median())
+    paths = block_bootstrap(history.to_numpy(), n_resamples, len(PROJECTION_YEARS), block_length,
+                            np.random.default_rng(seed))
+    paths.setflags(write=False)
+    return paths
+
+
+def bootstrap_growth_params(params, ticker, source='revenue', n_resamples=10_000, block_length=2, seed=42):
+    """
+    Return a copy of params whose growth_5y and growth_5_10y follow empirical
+    distributions of the stage-average bootstrapped growth of `source`
+    ('revenue' or 'operating_income'). The stage means and stds are set to match,
+    so summaries describe the bootstrapped inputs.
+    """
+    if source not in GROWTH_FIELDS:
+        raise ValueError(f"source must be one of: {', '.join(GROWTH_FIELDS)}")
+    if growth_history(ticker)[source].count() < 2:
+        raise ValueError(f"Not enough {GROWTH_FIELDS[source]} history for {ticker} to bootstrap growth")
+    paths = bootstrap_growth_paths(ticker, n_resamples, block_length, seed)[..., list(GROWTH_FIELDS).index(source)]
+    first_stage = PROJECTION_YEARS <= 5
+    stages = {
+        'growth_5y': ('growth_rate_5y', 'std_growth_5y', paths[:, first_stage].mean(axis=1)),
+        'growth_5_10y': ('growth_rate_5_10y', 'std_growth_5_10y', paths[:, ~first_stage].mean(axis=1)),
+    }
+    params = dict(params)
+    distributions = dict(params.get('distributions') or {})
+    for name, (mean_key, std_key, values) in stages.items():
+        distributions[name] = {'type': 'empirical', 'values': values}
+        params[mean_key] = float(values.mean())
+        params[std_key] = float(values.std())
+    params['distributions'] = distributions
+    return params
@@ -0,0 +1,295 @@
+"""
+Chunked Monte Carlo runs for very large path counts, with checkpoint/resume.
+
+Paths are simulated chunk by chunk and folded into streaming accumulators
+(value moments, a fixed-bin histogram sketch for quantiles and CVaR, FCF
+moments and input/value co-moments for sensitivities), so memory stays flat
+however many paths are run. The accumulator state, the RNG state and the
+next chunk index can be checkpointed to disk. A resumed run replays the
+remaining chunks in the same order from the same RNG state, so it finishes
+with exactly the same results as an uninterrupted run.
+
+With params['rng'] == 'philox' every path's draws are keyed by its index, so
+the paths themselves do not depend on chunk_size; the histogram sketch is then
+sized from a fixed pilot of the first paths rather than from the first chunk.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+from DCF_main import SIMULATED_PARAMS, PROJECTION_YEARS, simulate_paths, build_valuation_report
+
+SKETCH_BINS = 20000
+# Paths used to size the sketch in Philox mode, independently of chunk_size
+SKETCH_PILOT = 100_000
+CHECKPOINT_VERSION = 1
+
+
+class StreamingAccumulator:
+    """Mergeable running statistics for chunked simulations (Chan et al. pairwise updates)"""
+
+    ARRAY_FIELDS = ('edges', 'bin_counts', 'bin_sums', 'fcf_mean', 'fcf_m2', 'x_mean', 'x_m2', 'xy_c')
+    SCALAR_FIELDS = ('count', 'mean', 'm2', 'below', 'above', 'under_count', 'under_sum', 'over_count', 'over_sum')
+
+    def __init__(self, current_price, n_inputs=len(SIMULATED_PARAMS), n_years=len(PROJECTION_YEARS)):
+        self.current_price = current_price
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.below = 0
+        self.above = 0
+        # Histogram sketch; edges are fixed from the first chunk
+        self.edges = np.empty(0)
+        self.bin_counts = np.zeros(SKETCH_BINS, dtype=np.int64)
+        self.bin_sums = np.zeros(SKETCH_BINS)
+        self.under_count = 0
+        self.under_sum = 0.0
+        self.over_count = 0
+        self.over_sum = 0.0
+        self.fcf_mean = np.zeros(n_years)
+        self.fcf_m2 = np.zeros(n_years)
+        self.x_mean = np.zeros(n_inputs)
+        self.x_m2 = np.zeros(n_inputs)
+        self.xy_c = np.zeros(n_inputs)
+
+    def _init_sketch(self, results):
+        finite = results[np.isfinite(results)]
+        lo, hi = np.percentile(finite, [0.1, 99.9])
+        pad = 2 * max(hi - lo, abs(hi) * 1e-6, 1e-12)
+        self.edges = np.linspace(lo - pad, hi + pad, SKETCH_BINS + 1)
+
+    def update(self, inputs, results, fcf):
+        """Fold one chunk of simulated inputs (dict of arrays), values per share and FCF rows into the state"""
+        n_b = len(results)
+        if n_b == 0:
+            return
+        if self.edges.size == 0:
+            self._init_sketch(results)
+        x = np.column_stack([inputs[name] for name in SIMULATED_PARAMS])
+        n_a = self.count
+        n = n_a + n_b
+
+        # Chunk reductions run in float64 even when the paths are float32
+        mean_b = results.mean(dtype=np.float64)
+        dev_y = results - mean_b
+        m2_b = np.dot(dev_y, dev_y)
+        delta_y = mean_b - self.mean
+
+        x_mean_b = x.mean(axis=0, dtype=np.float64)
+        dev_x = x - x_mean_b
+        delta_x = x_mean_b - self.x_mean
+        self.x_m2 += np.einsum('ij,ij->j', dev_x, dev_x, dtype=np.float64) + delta_x ** 2 * n_a * n_b / n
+        self.xy_c += dev_x.T @ dev_y + delta_x * delta_y * n_a * n_b / n
+        self.x_mean += delta_x * n_b / n
+
+        fcf_mean_b = fcf.mean(axis=0, dtype=np.float64)
+        delta_f = fcf_mean_b - self.fcf_mean
+        self.fcf_m2 += ((fcf - fcf_mean_b) ** 2).sum(axis=0, dtype=np.float64) + delta_f ** 2 * n_a * n_b / n
+        self.fcf_mean += delta_f * n_b / n
+
+        self.m2 += m2_b + delta_y ** 2 * n_a * n_b / n
+        self.mean += delta_y * n_b / n
+        self.count = n
+
+        self.below += int(np.count_nonzero(results < self.current_price))
+        self.above += int(np.count_nonzero(results > self.current_price))
+
+        idx = np.searchsorted(self.edges, results, side='right') - 1
+        under = idx < 0
+        over = idx >= SKETCH_BINS
+        inside = ~(under | over)
+        self.under_count += int(under.sum())
+        self.under_sum += float(results[under].sum(dtype=np.float64))
+        self.over_count += int(over.sum())
+        self.over_sum += float(results[over].sum(dtype=np.float64))
+        self.bin_counts += np.bincount(idx[inside], minlength=SKETCH_BINS)
+        self.bin_sums += np.bincount(idx[inside], weights=results[inside], minlength=SKETCH_BINS)
+
+    def _quantile_position(self, q):
+        """(bin index, fraction of that bin) holding the q-quantile; index -1 means the underflow tail"""
+        target = q * self.count
+        if target <= self.under_count:
+            return -1, 0.0
+        cum = self.under_count + np.cumsum(self.bin_counts)
+        i = min(int(np.searchsorted(cum, target)), SKETCH_BINS - 1)
+        prev = cum[i] - self.bin_counts[i]
+        frac = (target - prev) / self.bin_counts[i] if self.bin_counts[i] else 1.0
+        return i, frac
+
+    def quantile(self, q):
+        i, frac = self._quantile_position(q)
+        if i < 0:
+            return self.edges[0]
+        return self.edges[i] + frac * (self.edges[i + 1] - self.edges[i])
+
+    def tail_mean(self, q):
+        """Mean of the values below the q-quantile (CVaR), assuming values spread evenly within a bin"""
+        i, frac = self._quantile_position(q)
+        if i < 0:
+            return self.under_sum / self.under_count
+        total = self.under_sum + self.bin_sums[:i].sum() + frac * self.bin_sums[i]
+        count = self.under_count + self.bin_counts[:i].sum() + frac * self.bin_counts[i]
+        return total / count
+
+    def statistics(self):
+        """Same keys as DCF_main.compute_statistics; quantiles and CVaR come from the sketch"""
+        price = self.current_price
+        return {
+            'mean_value': self.mean,
+            'median_value': self.quantile(0.5),
+            'std_value': np.sqrt(self.m2 / self.count),
+            'ci_lower': self.quantile(0.025),
+            'ci_upper': self.quantile(0.975),
+            'var_95': self.quantile(0.05),
+            'cvar_95': self.tail_mean(0.05),
+            'prob_overvalued': self.below / self.count * 100,
+            'prob_undervalued': self.above / self.count * 100,
+            'upside_potential': ((self.mean - price) / price) * 100,
+            'fcf_mean': self.fcf_mean.copy(),
+            'fcf_std': np.sqrt(self.fcf_m2 / self.count),
+        }
+
+    def sensitivities(self):
+        """
+        Streaming counterpart of DCF_main.compute_sensitivities. Rank correlations
+        cannot be accumulated chunk by chunk, so 'correlation' is Pearson here.
+        """
+        sample_std = np.sqrt(self.x_m2 / (self.count - 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.xy_c / np.sqrt(self.x_m2 * self.m2)
+            impact = (self.xy_c / self.count) / sample_std
+        return {
+            name: {'correlation': correlation[i], 'impact': impact[i]}
+            for i, name in enumerate(SIMULATED_PARAMS)
+        }
+
+    def histogram(self):
+        """Bin centers and counts of the occupied part of the sketch, for weighted plotting"""
+        occupied = np.flatnonzero(self.bin_counts)
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        return centers[occupied], self.bin_counts[occupied]
+
+    def to_arrays(self):
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        arrays['scalars'] = np.array([float(getattr(self, name)) for name in self.SCALAR_FIELDS])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, current_price, arrays):
+        acc = cls(current_price)
+        for name in cls.ARRAY_FIELDS:
+            setattr(acc, name, np.array(arrays[name]))
+        for name, value in zip(cls.SCALAR_FIELDS, arrays['scalars']):
+            setattr(acc, name, int(value) if name in ('count', 'below', 'above', 'under_count', 'over_count') else float(value))
+        return acc
+
+
+def _params_fingerprint(params, chunk_size):
+    """Digest of everything that determines the chunk sequence; resuming with different inputs is refused"""
+    payload = pickle.dumps((sorted(params.items()), chunk_size))
+    return hashlib.sha256(payload).hexdigest()
+
+
+def save_checkpoint(checkpoint_path, accumulator, rng, next_chunk, fingerprint):
+    """Atomically write accumulator state, RNG state and chunk index (write to a temp file, then rename)"""
+    checkpoint_path = Path(checkpoint_path)
+    meta = {
+        'version': CHECKPOINT_VERSION,
+        'fingerprint': fingerprint,
+        'next_chunk': next_chunk,
+        'rng_state': rng.bit_generator.state,
+    }
+    temp_file = checkpoint_path.with_name(checkpoint_path.name + '.tmp')
+    with open(temp_file, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **accumulator.to_arrays())
+        f.flush()
+        os.fsync(f.fileno())
+    temp_file.replace(checkpoint_path)
+
+
+def load_checkpoint(checkpoint_path, params, fingerprint):
+    """Return (accumulator, rng, next_chunk) from a checkpoint written for the same params and chunk size"""
+    with np.load(checkpoint_path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {meta.get('version')}")
+        if meta['fingerprint'] != fingerprint:
+            raise ValueError("Checkpoint was written for different parameters or chunk size")
+        accumulator = StreamingAccumulator.from_arrays(params['current_price'], data)
+    rng = np.random.default_rng()
+    rng.bit_generator.state = meta['rng_state']
+    return accumulator, rng, meta['next_chunk']
+
+
+def run_chunked_simulation(params, chunk_size=1_000_000, checkpoint_path=None, checkpoint_every=10, resume=False):
+    """
+    Run params['n_simulations'] paths in chunks of chunk_size and return the same
+    (fig_es, fig_distribution_only, fig_sensitivity, valuation_summary) tuple as
+    run_monte_carlo_simulation.
+
+    With checkpoint_path set, state is checkpointed every checkpoint_every chunks
+    and once at the end. With resume=True an existing checkpoint is picked up and
+    the run continues from its next chunk.
+    """
+    if params.get('importance_sampling'):
+        raise ValueError("Importance sampling is not supported for chunked runs; use run_monte_carlo_simulation")
+    n_total = params['n_simulations']
+    n_chunks = -(-n_total // chunk_size)
+    fingerprint = _params_fingerprint(params, chunk_size)
+
+    if resume and checkpoint_path and Path(checkpoint_path).exists():
+        accumulator, rng, next_chunk = load_checkpoint(checkpoint_path, params, fingerprint)
+    else:
+        accumulator = StreamingAccumulator(params['current_price'])
+        rng = np.random.default_rng(params.get('seed', 42))
+        next_chunk = 0
+        if params.get('rng', 'pcg64') == 'philox':
+            _, pilot, _, _ = simulate_paths(params, None, min(n_total, SKETCH_PILOT))
+            accumulator._init_sketch(pilot)
+
+    for chunk in range(next_chunk, n_chunks):
+        n_paths = min(chunk_size, n_total - chunk * chunk_size)
+        inputs, results, fcf, _ = simulate_paths(params, rng, n_paths, path_offset=chunk * chunk_size)
+        accumulator.update(inputs, results, fcf)
+        if checkpoint_path and ((chunk + 1) % checkpoint_every == 0 or chunk + 1 == n_chunks):
+            save_checkpoint(checkpoint_path, accumulator, rng, chunk + 1, fingerprint)
+
+    centers, counts = accumulator.histogram()
+    return build_valuation_report(params, accumulator.statistics(), accumulator.sensitivities(), centers, counts)
+
+
+def resume_simulation(params, checkpoint_path, chunk_size=1_000_000, checkpoint_every=10):
+    """Continue a chunked run from its last checkpoint (starts fresh if there is none yet)"""
+    return run_chunked_simulation(params, chunk_size, checkpoint_path, checkpoint_every, resume=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked DCF Monte Carlo run with checkpoint/resume")
+    parser.add_argument("params_file", help="JSON file with the simulation params dict")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--checkpoint", help="Checkpoint file (.npz); enables checkpointing")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="Chunks between checkpoints")
+    parser.add_argument("--resume", action="store_true", help="Continue from --checkpoint if it exists")
+    parser.add_argument("--output-dir", default="chunked_output")
+    args = parser.parse_args()
+
+    with open(args.params_file, 'r', encoding='utf-8') as f:
+        params = json.load(f)
+    fig_es, fig_distribution_only, fig_sensitivity, valuation_summary = run_chunked_simulation(
+        params, args.chunk_size, args.checkpoint, args.checkpoint_every, args.resume)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fig_es.savefig(output_dir / "results_plot.png", dpi=150, bbox_inches='tight')
+    with open(output_dir / "valuation_summary.json", 'w', encoding='utf-8') as f:
+        json.dump(valuation_summary, f, indent=2, ensure_ascii=False)
+    print(json.dumps(valuation_summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
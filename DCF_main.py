@@ -2,146 +2,56 @@ import os
 import sys
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
 from scipy.stats import spearmanr
+from scipy.special import ndtr, ndtri, stdtrit, betaincinv
 from datetime import datetime
-from matplotlib.gridspec import GridSpec # Import GridSpec
+from matplotlib import style as mpl_style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-def run_monte_carlo_simulation(params):
-    # Unpack parameters
-    company_name = params['company_name']
-    currency = params.get('currency', 'USD')
-    current_price = params['current_price']
-    operating_income_base = params['operating_income_base']  # This is EBIT
-    tax_rate = params.get('tax_rate', 0.21)  # Default to 21% if not provided
-    shares_outstanding = params['shares_outstanding']
-    cash = params['cash']
-    debt = params['debt']
-    growth_rate_5y = params['growth_rate_5y']
-    growth_rate_5_10y = params['growth_rate_5_10y']
-    risk_free_rate = params['risk_free_rate']
-    equity_risk_premium = params['equity_risk_premium']
-    WACC = params['WACC']
-    reinvestment_rate_5y = params['reinvestment_rate_5y']
-    reinvestment_rate_5_10y = params['reinvestment_rate_5_10y']
-    std_growth_5y = params['std_growth_5y']
-    std_growth_5_10y = params['std_growth_5_10y']
-    std_risk_free = params['std_risk_free']
-    std_equity_premium = params['std_equity_premium']
-    std_WACC = params['std_WACC']
-    std_reinv_5y = params['std_reinv_5y']
-    std_reinv_5_10y = params['std_reinv_5_10y']
-    n_simulations = params['n_simulations']
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    
-    # Calculate NOPAT from EBIT: NOPAT = EBIT * (1 - tax_rate)
-    nopat_base = operating_income_base * (1 - tax_rate)
-    
-    # Calculate terminal value parameters using base values
-    terminal_growth_base = risk_free_rate
-    terminal_WACC_base = risk_free_rate + equity_risk_premium
-    terminal_reinv_rate_base = risk_free_rate / (risk_free_rate + equity_risk_premium) if (risk_free_rate + equity_risk_premium) > 0 else 0
+PLOT_STYLE = 'seaborn-v0_8-darkgrid'
 
-    np.random.seed(42)
-    params_simulated = {
-        'growth_5y': [],
-        'growth_5_10y': [],
-        'risk_free': [],
-        'equity_premium': [],
-        'WACC': [],
-        'reinv_5y': [],
-        'reinv_5_10y': [],
-        'value_per_share': []
-    }
-    results = []
-    fcf_projections = []
-    for _ in range(n_simulations):
-        growth_rate_5y_sim = np.random.normal(growth_rate_5y, std_growth_5y)
-        growth_rate_5_10_sim = np.random.normal(growth_rate_5_10y, std_growth_5_10y)
-        risk_free_rate_sim = np.random.normal(risk_free_rate, std_risk_free)
-        equity_risk_premium_sim = np.random.normal(equity_risk_premium, std_equity_premium)
-        WACC_sim = np.random.normal(WACC, std_WACC)
-        reinv_rate_5y_sim = np.random.normal(reinvestment_rate_5y, std_reinv_5y)
-        reinv_rate_5_10y_sim = np.random.normal(reinvestment_rate_5_10y, std_reinv_5_10y)
-        params_simulated['growth_5y'].append(growth_rate_5y_sim)
-        params_simulated['growth_5_10y'].append(growth_rate_5_10_sim)
-        params_simulated['risk_free'].append(risk_free_rate_sim)
-        params_simulated['equity_premium'].append(equity_risk_premium_sim)
-        params_simulated['WACC'].append(WACC_sim)
-        params_simulated['reinv_5y'].append(reinv_rate_5y_sim)
-        params_simulated['reinv_5_10y'].append(reinv_rate_5_10y_sim)
-        terminal_WACC = risk_free_rate_sim + equity_risk_premium_sim
-        terminal_growth = risk_free_rate_sim
-        reinvestment_rate_terminal = risk_free_rate_sim / (risk_free_rate_sim + equity_risk_premium_sim)
-        # Use NOPAT instead of operating income for FCF calculations
-        nopat = nopat_base
-        FCFs = []
-        nopats = []
-        for year in range(1, 6):
-            nopat *= (1 + growth_rate_5y_sim)
-            nopats.append(nopat)
-            FCF = nopat * (1 - reinv_rate_5y_sim)
-            FCFs.append(FCF)
-        for year in range(6, 11):
-            nopat *= (1 + growth_rate_5_10_sim)
-            nopats.append(nopat)
-            FCF = nopat * (1 - reinv_rate_5_10y_sim)
-            FCFs.append(FCF)
-        nopat_terminal = nopat * (1 + terminal_growth)
-        FCF_terminal = nopat_terminal * (1 - reinvestment_rate_terminal)
-        terminal_value = FCF_terminal / (terminal_WACC - terminal_growth)
-        fcf_projections.append(FCFs)
-        discount_factors = [(1 + WACC_sim) ** i for i in range(1, 11)]
-        PV_FCF = sum([f / d for f, d in zip(FCFs, discount_factors)])
-        PV_terminal = terminal_value / ((1 + WACC_sim) ** 10)
-        EV = PV_FCF + PV_terminal
-        market_value = EV + cash - debt
-        value_per_share = market_value / shares_outstanding
-        results.append(value_per_share)
-        params_simulated['value_per_share'].append(value_per_share)
-    results = np.array(results)
-    mean_value = np.mean(results)
-    median_value = np.median(results)
-    std_value = np.std(results)
-    ci_lower = np.percentile(results, 2.5)
-    ci_upper = np.percentile(results, 97.5)
-    var_95 = np.percentile(results, 5)
-    cvar_95 = np.mean(results[results < var_95])
-    prob_overvalued = np.mean(results < current_price) * 100
-    prob_undervalued = np.mean(results > current_price) * 100
-    upside_potential = ((mean_value - current_price) / current_price) * 100
-    df_params = pd.DataFrame(params_simulated)
-    sensitivities = {}
-    for param in df_params.columns[:-1]:
-        correlation = spearmanr(df_params[param], df_params['value_per_share'])[0]
-        std_norm = (df_params[param] - df_params[param].mean()) / df_params[param].std()
-        coef = np.polyfit(std_norm, df_params['value_per_share'], 1)[0]
-        sensitivities[param] = {'correlation': correlation, 'impact': coef}
+# rcParams are process-global, so style contexts must not interleave across threads.
+_STYLE_LOCK = threading.Lock()
 
-    # Create the original combined 2x2 figure (fig_es)
-    fig_es, axs = plt.subplots(2, 2, figsize=(15, 10))
-    plt.style.use('seaborn-v0_8-darkgrid')
 
-    # Plot 1: Intrinsic Value Distribution
-    ax = axs[0, 0]
-    ax.hist(results, bins=50, density=True, alpha=0.7, color='skyblue', edgecolor='black')
+@contextmanager
+def _figure_style():
+    """Apply PLOT_STYLE while a figure is being built, without touching pyplot state"""
+    with _STYLE_LOCK, mpl_style.context(PLOT_STYLE):
+        yield
+
+
+def _new_figure(figsize):
+    """Create a figure bound to an Agg canvas (no pyplot registration, no plt.close needed)"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _plot_value_distribution(ax, results, mean_value, std_value, current_price, company_name, currency, weights=None, kde=None,
+                             price_label='Current Price'):
+    ax.hist(results, bins=50, weights=weights, density=True, alpha=0.7, color='skyblue', edgecolor='black')
+    if kde is not None:
+        ax.plot(kde[0], kde[1], color='navy', linewidth=1.5, label='KDE')
     ax.axvspan(mean_value - 3*std_value, mean_value - 2*std_value, color='red', alpha=0.1, label='±3σ')
     ax.axvspan(mean_value + 2*std_value, mean_value + 3*std_value, color='red', alpha=0.1)
     ax.axvspan(mean_value - 2*std_value, mean_value - std_value, color='orange', alpha=0.1, label='±2σ')
     ax.axvspan(mean_value + std_value, mean_value + 2*std_value, color='orange', alpha=0.1)
     ax.axvspan(mean_value - std_value, mean_value + std_value, color='green', alpha=0.1, label='±1σ')
     ax.axvline(mean_value, color='red', linestyle='--', label='Mean')
-    ax.axvline(current_price, color='purple', linestyle='-', label='Current Price')
+    ax.axvline(current_price, color='purple', linestyle='-', label=price_label)
     ax.set_title(f'{company_name} - Intrinsic Value Distribution')
     ax.set_xlabel(f'Intrinsic Value per Share ({currency})')
     ax.set_ylabel('Density')
     ax.legend()
 
-    # Plot 2: FCF Projection
-    ax = axs[1, 0]
-    fcf_mean = np.mean(fcf_projections, axis=0)
-    fcf_std = np.std(fcf_projections, axis=0)
-    years = range(1, 11)
+
+def _plot_fcf_projection(ax, fcf_mean, fcf_std, company_name, currency):
+    years = range(1, len(fcf_mean) + 1)
     ax.fill_between(years, 
                     fcf_mean - 3*fcf_std,
                     fcf_mean + 3*fcf_std,
@@ -167,18 +77,602 @@ def run_monte_carlo_simulation(params):
     ax.legend()
     ax.grid(True)
 
-    # Plot 3: Sensitivity Analysis (Tornado plot) within fig_es
-    ax = axs[1, 1]
-    sensitivity_data = pd.DataFrame.from_dict(sensitivities, orient='index')
-    sensitivity_data = sensitivity_data.sort_values('impact', ascending=True)
+
+def _plot_sensitivity(ax, sensitivity_data, company_name, currency):
+    # Tornado plot
     ax.barh(range(len(sensitivity_data)), sensitivity_data['impact'], align='center')
     ax.set_yticks(range(len(sensitivity_data)))
     ax.set_yticklabels(sensitivity_data.index)
     ax.set_title(f'{company_name} - Sensitivity Analysis')
     ax.set_xlabel(f'Impact on Value per Share ({currency}/σ)')
 
+
+# Simulated inputs: name -> (mean key, std key) in the params dict
+SIMULATED_PARAMS = {
+    'growth_5y': ('growth_rate_5y', 'std_growth_5y'),
+    'growth_5_10y': ('growth_rate_5_10y', 'std_growth_5_10y'),
+    'risk_free': ('risk_free_rate', 'std_risk_free'),
+    'equity_premium': ('equity_risk_premium', 'std_equity_premium'),
+    'WACC': ('WACC', 'std_WACC'),
+    'reinv_5y': ('reinvestment_rate_5y', 'std_reinv_5y'),
+    'reinv_5_10y': ('reinvestment_rate_5_10y', 'std_reinv_5_10y'),
+}
+
+PROJECTION_YEARS = np.arange(1, 11)
+
+# Registry of input distributions. A sampler maps an array of standard normal
+# draws to the target marginal (inverse-CDF transform) in one vectorized call:
+# sampler(z, mean, std, **options) -> array shaped like z.
+SAMPLERS = {}
+
+
+def register_sampler(name):
+    """Decorator registering a sampler under `name` for use in params['distributions']"""
+    def decorator(func):
+        SAMPLERS[name] = func
+        return func
+    return decorator
+
+
+@register_sampler('normal')
+def _sample_normal(z, mean, std):
+    return mean + std * z
+
+
+@register_sampler('truncated_normal')
+def _sample_truncated_normal(z, mean, std, low=None, high=None):
+    """Normal(mean, std) restricted to [low, high]; mean/std refer to the untruncated parent"""
+    alpha = (low - mean) / std if low is not None else -np.inf
+    beta = (high - mean) / std if high is not None else np.inf
+    if alpha > 0:
+        # Interval in the upper tail: invert through the upper-tail mass, where ndtr(alpha) would round to 1
+        a, b = ndtr(-alpha), ndtr(-beta)
+        x = -ndtri(a - (a - b) * ndtr(z))
+    else:
+        a, b = ndtr(alpha), ndtr(beta)
+        x = ndtri(a + (b - a) * ndtr(z))
+    # Beyond ~37 std even the tail mass underflows; all the probability then sits at the nearer bound
+    nearest = alpha if alpha > 0 else beta
+    x = np.where(np.isfinite(x), x, nearest)
+    return np.clip(mean + std * x, low, high)
+
+
+@register_sampler('lognormal')
+def _sample_lognormal(z, mean, std, shift=0.0):
+    """Lognormal with the given mean/std, optionally shifted so values stay above `shift`"""
+    excess = mean - shift
+    if excess <= 0:
+        raise ValueError("lognormal requires mean greater than shift")
+    sigma2 = np.log1p((std / excess) ** 2)
+    mu = np.log(excess) - sigma2 / 2
+    return shift + np.exp(mu + np.sqrt(sigma2) * z)
+
+
+@register_sampler('student_t')
+def _sample_student_t(z, mean, std, df=5.0):
+    """Student-t scaled so its standard deviation equals `std` (requires df > 2)"""
+    if df <= 2:
+        raise ValueError("student_t requires df > 2 for a finite standard deviation")
+    scale = std * np.sqrt((df - 2) / df)
+    # Invert through the lower tail for both signs to keep precision in the far tails
+    t = -np.sign(z) * stdtrit(df, ndtr(-np.abs(z)))
+    return mean + scale * t
+
+
+@register_sampler('triangular')
+def _sample_triangular(z, mean, std, low=None, high=None):
+    """Triangular on [low, high] with the mode set to match `mean`; symmetric with matching std by default"""
+    if low is None or high is None:
+        half_width = std * np.sqrt(6)
+        low, high = mean - half_width, mean + half_width
+    mode = min(max(3 * mean - low - high, low), high)
+    u = ndtr(z)
+    width = high - low
+    cut = (mode - low) / width
+    return np.where(
+        u < cut,
+        low + np.sqrt(u * width * (mode - low)),
+        high - np.sqrt((1 - u) * width * (high - mode)),
+    )
+
+
+@register_sampler('beta')
+def _sample_beta(z, mean, std, low=0.0, high=1.0):
+    """Beta on [low, high] fitted to mean/std by the method of moments"""
+    width = high - low
+    m = (mean - low) / width
+    v = (std / width) ** 2
+    if not 0 < m < 1 or v <= 0 or v >= m * (1 - m):
+        raise ValueError("beta requires low < mean < high and std below the Bernoulli bound")
+    k = m * (1 - m) / v - 1
+    return low + width * betaincinv(m * k, (1 - m) * k, ndtr(z))
+
+
+@register_sampler('empirical')
+def _sample_empirical(z, mean, std, values=()):
+    """Draws from the empirical distribution of `values` (interpolated quantiles); mean/std are ignored"""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        raise ValueError("empirical sampler requires a non-empty 'values' option")
+    return np.quantile(values, ndtr(z))
+
+
+def _distribution_spec(params, name):
+    """Return (sampler name, options) for a simulated input; plain strings are accepted as specs"""
+    spec = params.get('distributions', {}).get(name, 'normal')
+    if isinstance(spec, str):
+        return spec, {}
+    options = dict(spec)
+    return options.pop('type', 'normal'), options
+
+
+def sample_inputs(params, standard_normals, growth_innovations=None):
+    """
+    Transform a (..., len(SIMULATED_PARAMS)) array of standard normal draws into
+    simulated inputs, using the sampler chosen for each input in params['distributions'].
+    Returns a dict of arrays keyed by SIMULATED_PARAMS name, plus a (..., years)
+    'growth_path' when params['growth_process'] is 'ar1' (needs growth_innovations).
+    In that mode 'growth_5y' and 'growth_5_10y' hold each path's average annual
+    growth over the stage, so statistics and sensitivities describe the growth
+    the path actually used.
+    """
+    draws = {}
+    for i, (name, (mean_key, std_key)) in enumerate(SIMULATED_PARAMS.items()):
+        kind, options = _distribution_spec(params, name)
+        if kind not in SAMPLERS:
+            raise ValueError(f"Unknown distribution '{kind}' for {name}. Available: {', '.join(sorted(SAMPLERS))}")
+        mean, std = params[mean_key], params[std_key]
+        z = standard_normals[..., i]
+        if std <= 0 and kind != 'empirical':
+            draws[name] = np.full(z.shape, mean, dtype=z.dtype)
+        else:
+            draws[name] = np.asarray(SAMPLERS[kind](z, mean, std, **options), dtype=z.dtype)
+    if params.get('growth_process', 'stage') == 'ar1':
+        if growth_innovations is None:
+            raise ValueError("growth_process 'ar1' needs one standard normal innovation per path and year")
+        draws['growth_path'] = ar1_growth_paths(params, growth_innovations)
+        first_stage = PROJECTION_YEARS <= 5
+        draws['growth_5y'] = draws['growth_path'][..., first_stage].mean(axis=-1)
+        draws['growth_5_10y'] = draws['growth_path'][..., ~first_stage].mean(axis=-1)
+    return draws
+
+
+def _ar1_loadings(phi, sigma):
+    """
+    Lower-triangular (years x years) matrix L with deviations = innovations @ L.T for
+    d_t = sigma_t x_t, where x is a unit-variance stationary AR(1):
+    x_1 = e_1, x_t = phi x_{t-1} + sqrt(1 - phi^2) e_t. Each d_t has std sigma_t,
+    including across the stage change.
+    """
+    lags = PROJECTION_YEARS[:, None] - PROJECTION_YEARS[None, :]
+    scale = np.full(len(sigma), np.sqrt(1 - phi ** 2))
+    scale[0] = 1.0
+    return sigma[:, None] * np.where(lags >= 0, phi ** np.maximum(lags, 0), 0.0) * scale[None, :]
+
+
+def ar1_growth_paths(params, innovations):
+    """
+    Annual growth as a (paths x years) matrix that mean-reverts around the stage
+    means (growth_rate_5y for years 1-5, growth_rate_5_10y after). The recursion
+    is unrolled into one matrix product, so there is no per-year Python loop.
+
+    params['growth_persistence'] is the AR(1) coefficient (default 0.6) and
+    params['std_growth_annual'] the stationary std of the annual deviation. It
+    defaults to each stage's std, so a single year's growth has exactly the std
+    entered for its stage; the stage distribution choice does not apply here.
+    """
+    phi = params.get('growth_persistence', 0.6)
+    if not 0 <= phi < 1:
+        raise ValueError("growth_persistence must be in [0, 1)")
+    first_stage = PROJECTION_YEARS <= 5
+    annual_std = params.get('std_growth_annual')
+    if annual_std is None:
+        sigma = np.where(first_stage, params['std_growth_5y'], params['std_growth_5_10y'])
+    else:
+        sigma = np.full(len(PROJECTION_YEARS), float(annual_std))
+    levels = np.where(first_stage, params['growth_rate_5y'], params['growth_rate_5_10y']).astype(innovations.dtype)
+    return levels + innovations @ _ar1_loadings(phi, sigma).T.astype(innovations.dtype)
+
+
+def _correlation_matrix(spec):
+    """
+    Build a full correlation matrix over SIMULATED_PARAMS from a spec: a square
+    array in SIMULATED_PARAMS order, a labelled DataFrame covering a subset of
+    inputs, or a dict of pairwise entries {('growth_5y', 'WACC'): -0.3}.
+    Inputs that are not mentioned stay independent.
+    """
+    names = list(SIMULATED_PARAMS)
+    matrix = np.eye(len(names))
+    if isinstance(spec, pd.DataFrame):
+        for a in spec.index:
+            for b in spec.columns:
+                matrix[names.index(a), names.index(b)] = spec.loc[a, b]
+    elif isinstance(spec, dict):
+        for (a, b), rho in spec.items():
+            i, j = names.index(a), names.index(b)
+            matrix[i, j] = matrix[j, i] = rho
+    else:
+        matrix = np.array(spec, dtype=float)
+        if matrix.shape != (len(names), len(names)):
+            raise ValueError(f"correlation matrix must be {len(names)}x{len(names)} in the order {names}")
+    if not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1.0):
+        raise ValueError("correlation matrix must be symmetric with a unit diagonal")
+    return matrix
+
+
+@lru_cache(maxsize=32)
+def _cholesky_factor(matrix_bytes, size):
+    """Cholesky factor of a correlation matrix, cached per matrix so repeated runs skip the setup"""
+    matrix = np.frombuffer(matrix_bytes, dtype=float).reshape(size, size)
+    try:
+        factor = np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        raise ValueError("correlation matrix must be positive definite") from None
+    factor.setflags(write=False)
+    return factor
+
+
+def latent_correlation(params):
+    """Correlation matrix of the latent normals over SIMULATED_PARAMS implied by params, or None if independent"""
+    if params.get('rank_correlation') is not None:
+        return 2 * np.sin(np.pi * _correlation_matrix(params['rank_correlation']) / 6)
+    if params.get('correlation') is not None:
+        return _correlation_matrix(params['correlation'])
+    return None
+
+
+def correlate_normals(params, standard_normals):
+    """
+    Impose the dependence structure from params on independent standard normal draws.
+
+    params['correlation'] is the correlation of the latent normals (equal to the
+    Pearson correlation for normal inputs). params['rank_correlation'] is a Spearman
+    spec, mapped to the Gaussian copula with rho = 2 sin(pi * rho_s / 6). Because
+    every sampler is an inverse-CDF transform, correlated normals give a Gaussian
+    copula whatever distribution each input uses.
+    """
+    matrix = latent_correlation(params)
+    if matrix is None:
+        return standard_normals
+    factor = _cholesky_factor(np.ascontiguousarray(matrix).tobytes(), matrix.shape[0])
+    return standard_normals @ factor.T.astype(standard_normals.dtype)
+
+
+def value_paths(draws, params):
+    """
+    Vectorized DCF valuation over arrays of simulated inputs (any broadcastable shape).
+    Returns (value_per_share, fcf) where fcf carries the projection years on its last axis.
+
+    Year-by-year projections are computed in params['dtype'] (default float64);
+    present-value sums, the terminal value and value per share always use float64.
+    """
+    dtype = np.dtype(params.get('dtype', 'float64'))
+    nopat_base = params['operating_income_base'] * (1 - params.get('tax_rate', 0.21))
+    first_stage = PROJECTION_YEARS <= 5
+    if 'growth_path' in draws:
+        growth = np.asarray(draws['growth_path'], dtype=dtype)
+    else:
+        growth = np.where(first_stage, np.asarray(draws['growth_5y'], dtype=dtype)[..., None], np.asarray(draws['growth_5_10y'], dtype=dtype)[..., None])
+    reinvestment = np.where(first_stage, np.asarray(draws['reinv_5y'], dtype=dtype)[..., None], np.asarray(draws['reinv_5_10y'], dtype=dtype)[..., None])
+    risk_free = np.asarray(draws['risk_free'], dtype=np.float64)
+    equity_premium = np.asarray(draws['equity_premium'], dtype=np.float64)
+    wacc = np.asarray(draws['WACC'], dtype=dtype)
+
+    # Use NOPAT instead of operating income for FCF calculations
+    nopats = nopat_base * np.cumprod(1 + growth, axis=-1)
+    fcf = nopats * (1 - reinvestment)
+
+    terminal_WACC = risk_free + equity_premium
+    terminal_growth = risk_free
+    reinvestment_rate_terminal = risk_free / terminal_WACC
+    FCF_terminal = nopats[..., -1].astype(np.float64) * (1 + terminal_growth) * (1 - reinvestment_rate_terminal)
+    terminal_value = FCF_terminal / (terminal_WACC - terminal_growth)
+
+    discount_factors = (1 + wacc)[..., None] ** PROJECTION_YEARS.astype(dtype)
+    PV_FCF = np.sum(fcf / discount_factors, axis=-1, dtype=np.float64)
+    PV_terminal = terminal_value / discount_factors[..., -1].astype(np.float64)
+    EV = PV_FCF + PV_terminal
+    market_value = EV + params['cash'] - params['debt']
+    return market_value / params['shares_outstanding'], fcf
+
+
+def _describe_param(params, name):
+    """Summary string for a simulated input, e.g. '15.0% (±2.0%)' or '15.0% (±2.0%, student_t)'"""
+    mean_key, std_key = SIMULATED_PARAMS[name]
+    kind, _ = _distribution_spec(params, name)
+    suffix = '' if kind == 'normal' else f", {kind}"
+    return f"{params[mean_key]*100:.1f}% (±{params[std_key]*100:.1f}%{suffix})"
+
+
+def philox_standard_normals(seed, start, stop, n_dims):
+    """
+    Standard normals for paths [start, stop) from a Philox4x64 stream keyed by seed.
+    Path i always reads counter blocks i*B+1 .. i*B+B (B = ceil(n_dims / 4)), so its
+    draws do not depend on how the paths are chunked or split across workers.
+    """
+    blocks_per_path = -(-n_dims // 4)
+    # Philox increments its counter before each block, hence the +1 above
+    bit_generator = np.random.Philox(key=seed, counter=start * blocks_per_path)
+    words = bit_generator.random_raw((stop - start) * blocks_per_path * 4)
+    words = words.reshape(stop - start, blocks_per_path * 4)[:, :n_dims]
+    # 53-bit uniforms strictly inside (0, 1), then the inverse normal CDF
+    return ndtri(((words >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53)
+
+
+def draw_standard_normals(params, rng, n_paths, path_offset=0):
+    """
+    Return (standard_normals, growth_innovations) for n_paths paths, before correlation.
+    params['rng'] == 'philox' draws path-indexed Philox normals starting at path_offset
+    (rng is then unused); otherwise the normals come from rng in sequence.
+    """
+    n_inputs = len(SIMULATED_PARAMS)
+    ar1 = params.get('growth_process', 'stage') == 'ar1'
+    dtype = np.dtype(params.get('dtype', 'float64'))
+    if params.get('rng', 'pcg64') == 'philox':
+        n_dims = n_inputs + (len(PROJECTION_YEARS) if ar1 else 0)
+        normals = philox_standard_normals(params.get('seed', 42), path_offset, path_offset + n_paths, n_dims)
+        normals = normals.astype(dtype, copy=False)
+        return normals[:, :n_inputs], (normals[:, n_inputs:] if ar1 else None)
+    standard_normals = rng.standard_normal((n_paths, n_inputs), dtype=dtype)
+    growth_innovations = rng.standard_normal((n_paths, len(PROJECTION_YEARS)), dtype=dtype) if ar1 else None
+    return standard_normals, growth_innovations
+
+
+def _value_gradient(params, step=1e-3):
+    """Central-difference gradient of value per share w.r.t. the independent latent normals at z = 0"""
+    params = dict(params, dtype='float64')
+    n_inputs = len(SIMULATED_PARAMS)
+    standard_normals = np.vstack([np.eye(n_inputs) * step, -np.eye(n_inputs) * step])
+    growth_innovations = None
+    if params.get('growth_process', 'stage') == 'ar1':
+        growth_innovations = np.zeros((2 * n_inputs, len(PROJECTION_YEARS)))
+    draws = sample_inputs(params, correlate_normals(params, standard_normals), growth_innovations)
+    values, _ = value_paths(draws, params)
+    return (values[:n_inputs] - values[n_inputs:]) / (2 * step)
+
+
+def importance_tilt(params, standard_normals):
+    """
+    Exponentially tilt independent standard normals toward the low-value tail.
+    The mean is shifted by mu, of norm params['importance_shift'] (default 1.0),
+    against the gradient of value per share in latent space (lower growth, higher
+    WACC and so on); larger shifts oversample the tail further but cost effective
+    sample size. Each path gets the likelihood ratio exp(|mu|^2 / 2 - mu.z) so
+    that weighted statistics stay unbiased.
+    Returns (shifted_normals, weights).
+    """
+    gradient = np.nan_to_num(_value_gradient(params))
+    norm = np.linalg.norm(gradient)
+    if norm == 0:
+        return standard_normals, np.ones(len(standard_normals))
+    shift = -gradient * params.get('importance_shift', 1.0) / norm
+    shifted = standard_normals + shift
+    return shifted.astype(standard_normals.dtype), np.exp(0.5 * shift @ shift - shifted @ shift)
+
+
+def simulate_paths(params, rng, n_paths, path_offset=0):
+    """
+    Draw and value n_paths paths from `rng` (or paths path_offset.. in Philox mode).
+    Returns (inputs, value_per_share, fcf, weights) where inputs maps each
+    SIMULATED_PARAMS name to its per-path draws (stage levels when growth follows
+    AR(1)) and weights holds importance-sampling likelihood ratios, or None when
+    params['importance_sampling'] is off.
+    """
+    standard_normals, growth_innovations = draw_standard_normals(params, rng, n_paths, path_offset)
+    return evaluate_normals(params, standard_normals, growth_innovations)
+
+
+def evaluate_normals(params, standard_normals, growth_innovations=None):
+    """
+    Value paths from independent standard normals (as returned by draw_standard_normals),
+    cast to params['dtype']; returns the same tuple as simulate_paths.
+    """
+    dtype = np.dtype(params.get('dtype', 'float64'))
+    weights = None
+    if params.get('importance_sampling'):
+        standard_normals, weights = importance_tilt(params, standard_normals)
+    standard_normals = correlate_normals(params, standard_normals.astype(dtype, copy=False))
+    if growth_innovations is not None:
+        growth_innovations = growth_innovations.astype(dtype, copy=False)
+    draws = sample_inputs(params, standard_normals, growth_innovations)
+    results, fcf = value_paths(draws, params)
+    return {name: draws[name] for name in SIMULATED_PARAMS}, results, fcf, weights
+
+
+def weighted_quantile(values, weights, q):
+    """Quantile q (0-1) of weighted samples, interpolating between weight midpoints"""
+    order = np.argsort(values)
+    sorted_values, sorted_weights = values[order], weights[order]
+    positions = (np.cumsum(sorted_weights) - 0.5 * sorted_weights) / sorted_weights.sum()
+    return np.interp(q, positions, sorted_values)
+
+
+def _weighted_statistics(results, fcf_projections, current_price, weights):
+    """compute_statistics for importance-weighted paths (self-normalized estimators)"""
+    p = weights / weights.sum()
+    mean_value = p @ results
+    var_95 = weighted_quantile(results, weights, 0.05)
+    tail = results < var_95
+    fcf_mean = p @ fcf_projections
+    return {
+        'mean_value': mean_value,
+        'median_value': weighted_quantile(results, weights, 0.5),
+        'std_value': np.sqrt(p @ (results - mean_value) ** 2),
+        'ci_lower': weighted_quantile(results, weights, 0.025),
+        'ci_upper': weighted_quantile(results, weights, 0.975),
+        'var_95': var_95,
+        'cvar_95': (p[tail] @ results[tail]) / p[tail].sum(),
+        'prob_overvalued': p[results < current_price].sum() * 100,
+        'prob_undervalued': p[results > current_price].sum() * 100,
+        'upside_potential': ((mean_value - current_price) / current_price) * 100,
+        'fcf_mean': fcf_mean,
+        'fcf_std': np.sqrt(p @ (fcf_projections - fcf_mean) ** 2),
+        'effective_sample_size': weights.sum() ** 2 / (weights @ weights),
+    }
+
+
+# Grid size of the binned KDE; its cost depends on this, not on the number of paths
+KDE_GRID_POINTS = 512
+
+
+def fft_kde(values, weights=None, grid_points=KDE_GRID_POINTS, bandwidth=None):
+    """
+    Gaussian kernel density estimate by linear binning and FFT convolution.
+    Values are binned onto grid_points points in O(n), then convolved with the
+    kernel in O(grid log grid). The default bandwidth is Silverman's rule; integer
+    weights are read as counts (histogram sketches), float weights as importance
+    weights with their effective sample size. The grid spans the 0.1-99.9%
+    quantiles plus three bandwidths, so extreme paths do not coarsen it.
+    Returns (grid, density); both are empty for a degenerate sample.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    unweighted = weights is None
+    counts = not unweighted and np.issubdtype(np.asarray(weights).dtype, np.integer)
+    weights = np.ones_like(values) if unweighted else np.asarray(weights, dtype=np.float64)
+    finite = np.isfinite(values) & (weights > 0)
+    values, weights = values[finite], weights[finite]
+    total = weights.sum()
+    mean = weights @ values / total
+    std = np.sqrt(weights @ (values - mean) ** 2 / total)
+    if unweighted:
+        q_low, q25, q75, q_high = np.percentile(values, [0.1, 25, 75, 99.9])
+    else:
+        q_low, q25, q75, q_high = weighted_quantile(values, weights, [0.001, 0.25, 0.75, 0.999])
+    if bandwidth is None:
+        n_eff = total if unweighted or counts else total ** 2 / (weights @ weights)
+        spread = min(std, (q75 - q25) / 1.34) or std
+        bandwidth = 0.9 * spread * n_eff ** -0.2
+    if not bandwidth > 0:
+        return np.empty(0), np.empty(0)
+
+    lo, hi = q_low - 3 * bandwidth, q_high + 3 * bandwidth
+    grid = np.linspace(lo, hi, grid_points)
+    delta = grid[1] - grid[0]
+    position = (values - lo) / delta
+    inside = (position >= 0) & (position < grid_points - 1)
+    left = position[inside].astype(np.int64)
+    frac = position[inside] - left
+    binned = (np.bincount(left, weights[inside] * (1 - frac), minlength=grid_points)
+              + np.bincount(left + 1, weights[inside] * frac, minlength=grid_points))
+
+    # Zero-padded linear convolution with the kernel sampled on the same spacing
+    offsets = np.arange(-(grid_points - 1), grid_points) * delta
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 2 ** int(np.ceil(np.log2(3 * grid_points - 2)))
+    convolved = np.fft.irfft(np.fft.rfft(binned, size) * np.fft.rfft(kernel, size), size)
+    density = convolved[grid_points - 1:2 * grid_points - 1] / total
+    return grid, np.maximum(density, 0.0)
+
+
+def compute_statistics(results, fcf_projections, current_price, weights=None):
+    """
+    Summary statistics of the simulated values per share and the FCF projections.
+    With importance-sampling weights the estimators are weighted and the effective
+    sample size is included.
+    """
+    if weights is not None:
+        return _weighted_statistics(results, fcf_projections, current_price, weights)
+    mean_value = np.mean(results)
+    var_95 = np.percentile(results, 5)
+    return {
+        'mean_value': mean_value,
+        'median_value': np.median(results),
+        'std_value': np.std(results),
+        'ci_lower': np.percentile(results, 2.5),
+        'ci_upper': np.percentile(results, 97.5),
+        'var_95': var_95,
+        'cvar_95': np.mean(results[results < var_95]),
+        'prob_overvalued': np.mean(results < current_price) * 100,
+        'prob_undervalued': np.mean(results > current_price) * 100,
+        'upside_potential': ((mean_value - current_price) / current_price) * 100,
+        'fcf_mean': np.mean(fcf_projections, axis=0, dtype=np.float64),
+        'fcf_std': np.std(fcf_projections, axis=0, dtype=np.float64),
+    }
+
+
+def _weighted_ranks(values, p):
+    """Mid-point positions of values in the weighted empirical CDF (rank / n for equal weights)"""
+    order = np.argsort(values)
+    ranks = np.empty_like(p)
+    ranks[order] = np.cumsum(p[order]) - 0.5 * p[order]
+    return ranks
+
+
+def _weighted_correlation(x, y, p):
+    dx, dy = x - p @ x, y - p @ y
+    return (p @ (dx * dy)) / np.sqrt((p @ dx**2) * (p @ dy**2))
+
+
+def compute_sensitivities(inputs, results, weights=None):
+    """
+    Spearman correlation and impact per standard deviation of each input on value per share.
+    With importance-sampling weights both are weighted (weighted-CDF ranks and a weighted
+    regression), so they describe the untilted input distributions.
+    """
+    sensitivities = {}
+    if weights is not None:
+        p = np.asarray(weights, dtype=np.float64) / np.sum(weights)
+        results = np.asarray(results, dtype=np.float64)
+        result_ranks = _weighted_ranks(results, p)
+        for param, values in inputs.items():
+            values = np.asarray(values, dtype=np.float64)
+            deviation = values - p @ values
+            std = np.sqrt(p @ deviation**2)
+            sensitivities[param] = {
+                'correlation': _weighted_correlation(_weighted_ranks(values, p), result_ranks, p),
+                'impact': (p @ (deviation * (results - p @ results))) / std,
+            }
+        return sensitivities
+    for param, values in inputs.items():
+        correlation = spearmanr(values, results)[0]
+        std_norm = (values - values.mean()) / values.std(ddof=1)
+        coef = np.polyfit(std_norm, results, 1)[0]
+        sensitivities[param] = {'correlation': correlation, 'impact': coef}
+    return sensitivities
+
+
+def build_valuation_report(params, stats, sensitivities, hist_values, hist_weights=None):
+    """
+    Render the three figures and the valuation summary dict from computed statistics.
+    hist_values/hist_weights feed the distribution histogram (raw values, or bin
+    centers with counts when only a sketch of the distribution is available).
+    """
+    company_name = params['company_name']
+    currency = params.get('currency', 'USD')
+    current_price = params['current_price']
+    risk_free_rate = params['risk_free_rate']
+    equity_risk_premium = params['equity_risk_premium']
+    mean_value = stats['mean_value']
+    median_value = stats['median_value']
+    std_value = stats['std_value']
+    var_95 = stats['var_95']
+    cvar_95 = stats['cvar_95']
+    prob_overvalued = stats['prob_overvalued']
+    prob_undervalued = stats['prob_undervalued']
+    upside_potential = stats['upside_potential']
+    current_date = datetime.now().strftime("%Y-%m-%d")
+
+    # Calculate terminal value parameters using base values
+    terminal_growth_base = risk_free_rate
+    terminal_WACC_base = risk_free_rate + equity_risk_premium
+    terminal_reinv_rate_base = risk_free_rate / (risk_free_rate + equity_risk_premium) if (risk_free_rate + equity_risk_premium) > 0 else 0
+
+    variable_parameters = {
+        'Growth 5y': _describe_param(params, 'growth_5y'),
+        'Growth 5-10y': _describe_param(params, 'growth_5_10y'),
+        'WACC': _describe_param(params, 'WACC'),
+        'Risk Premium': _describe_param(params, 'equity_premium'),
+        'Risk Free Rate': _describe_param(params, 'risk_free'),
+        'Reinvestment 5y': _describe_param(params, 'reinv_5y'),
+        'Reinvestment 5-10y': _describe_param(params, 'reinv_5_10y'),
+    }
+    if params.get('growth_process', 'stage') == 'ar1':
+        annual_std = params.get('std_growth_annual')
+        annual = "stage std" if annual_std is None else f"{annual_std*100:.1f}%"
+        variable_parameters['Growth Process'] = (f"AR(1) around stage means, φ={params.get('growth_persistence', 0.6):.2f}, "
+                                                 f"annual std {annual}")
+
     # Matplotlib-rendered Valuation Summary within fig_es
-    axs[0, 1].axis('off')
     title = (
         f"VALUATION SUMMARY - {company_name}\n"
         f"Date: {current_date}\n"
@@ -197,16 +691,12 @@ def run_monte_carlo_simulation(params):
         f"CVaR 95%: {cvar_95:.2f} {currency}\n"
         f"Std. Deviation: {std_value:.2f} {currency}"
     )
+    if 'effective_sample_size' in stats:
+        left_column += f"\nEff. Sample Size: {stats['effective_sample_size']:,.0f}"
     right_column = (
         f"Variable Parameters:\n"
-        f"Growth 5y: {growth_rate_5y*100:.1f}% (±{std_growth_5y*100:.1f}%)\n"
-        f"Growth 5-10y: {growth_rate_5_10y*100:.1f}% (±{std_growth_5_10y*100:.1f}%)\n"
-        f"WACC: {WACC*100:.1f}% (±{std_WACC*100:.1f}%)\n"
-        f"Risk Premium: {equity_risk_premium*100:.1f}% (±{std_equity_premium*100:.1f}%)\n"
-        f"Risk Free Rate: {risk_free_rate*100:.1f}% (±{std_risk_free*100:.1f}%)\n"
-        f"Reinvestment 5y: {reinvestment_rate_5y*100:.1f}% (±{std_reinv_5y*100:.1f}%)\n"
-        f"Reinvestment 5-10y: {reinvestment_rate_5_10y*100:.1f}% (±{std_reinv_5_10y*100:.1f}%)\n"
-        f"\nTerminal Value Params:\n"
+        + ''.join(f"{label}: {value}\n" for label, value in variable_parameters.items())
+        + f"\nTerminal Value Params:\n"
         f"Term. Growth: {terminal_growth_base*100:.2f}%\n"
         f"Term. WACC: {terminal_WACC_base*100:.2f}%\n"
         f"Term. Reinv Rate: {terminal_reinv_rate_base*100:.2f}%"
@@ -220,39 +710,38 @@ def run_monte_carlo_simulation(params):
     for left, right in zip(left_lines, right_lines):
         combined_lines.append(f"{left:<35} {right:<35}")
     summary_text = title + '\n\n' + '\n'.join(combined_lines)
-    axs[0, 1].text(0.5, 0.5, summary_text, fontsize=10, fontfamily='monospace', 
-                  horizontalalignment='center', verticalalignment='center',
-                  bbox=dict(facecolor='white', alpha=0.8))
 
-    plt.tight_layout()
+    sensitivity_data = pd.DataFrame.from_dict(sensitivities, orient='index')
+    sensitivity_data = sensitivity_data.sort_values('impact', ascending=True)
+
+    kde = fft_kde(hist_values, hist_weights)
+
+    # Create the original combined 2x2 figure (fig_es)
+    with _figure_style():
+        fig_es = _new_figure(figsize=(15, 10))
+        axs = fig_es.subplots(2, 2)
+        _plot_value_distribution(axs[0, 0], hist_values, mean_value, std_value, current_price, company_name, currency, hist_weights, kde)
+        _plot_fcf_projection(axs[1, 0], stats['fcf_mean'], stats['fcf_std'], company_name, currency)
+        _plot_sensitivity(axs[1, 1], sensitivity_data, company_name, currency)
+        axs[0, 1].axis('off')
+        axs[0, 1].text(0.5, 0.5, summary_text, fontsize=10, fontfamily='monospace',
+                       horizontalalignment='center', verticalalignment='center',
+                       bbox=dict(facecolor='white', alpha=0.8))
+        fig_es.tight_layout()
 
     # Create a separate figure for Intrinsic Value Distribution only
-    fig_distribution_only, ax_dist_only = plt.subplots(figsize=(10, 6))
-    plt.style.use('seaborn-v0_8-darkgrid')
-    ax_dist_only.hist(results, bins=50, density=True, alpha=0.7, color='skyblue', edgecolor='black')
-    ax_dist_only.axvspan(mean_value - 3*std_value, mean_value - 2*std_value, color='red', alpha=0.1, label='±3σ')
-    ax_dist_only.axvspan(mean_value + 2*std_value, mean_value + 3*std_value, color='red', alpha=0.1)
-    ax_dist_only.axvspan(mean_value - 2*std_value, mean_value - std_value, color='orange', alpha=0.1, label='±2σ')
-    ax_dist_only.axvspan(mean_value + std_value, mean_value + 2*std_value, color='orange', alpha=0.1)
-    ax_dist_only.axvspan(mean_value - std_value, mean_value + std_value, color='green', alpha=0.1, label='±1σ')
-    ax_dist_only.axvline(mean_value, color='red', linestyle='--', label='Mean')
-    ax_dist_only.axvline(current_price, color='purple', linestyle='-', label='Current Price')
-    ax_dist_only.set_title(f'{company_name} - Intrinsic Value Distribution')
-    ax_dist_only.set_xlabel(f'Intrinsic Value per Share ({currency})')
-    ax_dist_only.set_ylabel('Density')
-    ax_dist_only.legend()
-    plt.tight_layout()
+    with _figure_style():
+        fig_distribution_only = _new_figure(figsize=(10, 6))
+        ax_dist_only = fig_distribution_only.subplots()
+        _plot_value_distribution(ax_dist_only, hist_values, mean_value, std_value, current_price, company_name, currency, hist_weights, kde)
+        fig_distribution_only.tight_layout()
 
     # Create a separate figure for Sensitivity Analysis only
-    fig_sensitivity, ax_sens_only = plt.subplots(figsize=(10, 6))
-    sensitivity_data = pd.DataFrame.from_dict(sensitivities, orient='index')
-    sensitivity_data = sensitivity_data.sort_values('impact', ascending=True)
-    ax_sens_only.barh(range(len(sensitivity_data)), sensitivity_data['impact'], align='center')
-    ax_sens_only.set_yticks(range(len(sensitivity_data)))
-    ax_sens_only.set_yticklabels(sensitivity_data.index)
-    ax_sens_only.set_title(f'{company_name} - Sensitivity Analysis')
-    ax_sens_only.set_xlabel(f'Impact on Value per Share ({currency}/σ)')
-    plt.tight_layout()
+    with _figure_style():
+        fig_sensitivity = _new_figure(figsize=(10, 6))
+        ax_sens_only = fig_sensitivity.subplots()
+        _plot_sensitivity(ax_sens_only, sensitivity_data, company_name, currency)
+        fig_sensitivity.tight_layout()
 
     # Create valuation summary dictionary
     valuation_summary = {
@@ -267,20 +756,68 @@ def run_monte_carlo_simulation(params):
         'VaR 95%': f"{var_95:.2f} {currency}",
         'CVaR 95%': f"{cvar_95:.2f} {currency}",
         'Std. Deviation': f"{std_value:.2f} {currency}",
-        'Variable Parameters': {
-            'Growth 5y': f"{growth_rate_5y*100:.1f}% (±{std_growth_5y*100:.1f}%)",
-            'Growth 5-10y': f"{growth_rate_5_10y*100:.1f}% (±{std_growth_5_10y*100:.1f}%)",
-            'WACC': f"{WACC*100:.1f}% (±{std_WACC*100:.1f}%)",
-            'Risk Premium': f"{equity_risk_premium*100:.1f}% (±{std_equity_premium*100:.1f}%)",
-            'Risk Free Rate': f"{risk_free_rate*100:.1f}% (±{std_risk_free*100:.1f}%)",
-            'Reinvestment 5y': f"{reinvestment_rate_5y*100:.1f}% (±{std_reinv_5y*100:.1f}%)",
-            'Reinvestment 5-10y': f"{reinvestment_rate_5_10y*100:.1f}% (±{std_reinv_5_10y*100:.1f}%)"
-        },
+        'Variable Parameters': variable_parameters,
         'Terminal Value Params': {
             'Term. Growth': f"{terminal_growth_base*100:.2f}%",
             'Term. WACC': f"{terminal_WACC_base*100:.2f}%",
             'Term. Reinv Rate': f"{terminal_reinv_rate_base*100:.2f}%"
         }
     }
+    # Density curve as plain lists so the summary stays JSON-serializable
+    valuation_summary['Density'] = {
+        'value': [round(float(x), 4) for x in kde[0]],
+        'density': [float(f"{y:.6g}") for y in kde[1]],
+    }
+    if 'effective_sample_size' in stats:
+        valuation_summary['Effective Sample Size'] = f"{stats['effective_sample_size']:,.0f}"
+
+    return fig_es, fig_distribution_only, fig_sensitivity, valuation_summary
 
-    return fig_es, fig_distribution_only, fig_sensitivity, valuation_summary 
+
+# Metrics compared by dtype_accuracy_report (compute_statistics keys)
+ACCURACY_METRICS = ['mean_value', 'median_value', 'std_value', 'ci_lower', 'ci_upper',
+                    'var_95', 'cvar_95', 'prob_overvalued', 'prob_undervalued']
+
+
+def dtype_accuracy_report(params, n_paths=None, dtype='float32'):
+    """
+    Compare a reduced-precision run against float64 on identical draws.
+    Returns a DataFrame indexed by metric (the ACCURACY_METRICS, terminal-year mean
+    FCF and the worst per-path value difference) with columns float64, <dtype>,
+    abs_error and rel_error.
+    """
+    n_paths = n_paths or params['n_simulations']
+    reference = dict(params, dtype='float64')
+    standard_normals, growth_innovations = draw_standard_normals(
+        reference, np.random.default_rng(params.get('seed', 42)), n_paths)
+    runs = {}
+    for name in ('float64', dtype):
+        _, results, fcf, weights = evaluate_normals(dict(params, dtype=name), standard_normals, growth_innovations)
+        stats = compute_statistics(results, fcf, params['current_price'], weights)
+        runs[name] = (results, {**{key: stats[key] for key in ACCURACY_METRICS}, 'fcf_mean_final_year': stats['fcf_mean'][-1]})
+    report = pd.DataFrame({name: metrics for name, (_, metrics) in runs.items()})
+    report['abs_error'] = (report[dtype] - report['float64']).abs()
+    report['rel_error'] = report['abs_error'] / report['float64'].abs()
+    max_path_error = np.max(np.abs(runs[dtype][0] - runs['float64'][0]))
+    mean_abs_value = np.mean(np.abs(runs['float64'][0]))
+    report.loc['max_path_error'] = [0.0, max_path_error, max_path_error, max_path_error / mean_abs_value]
+    return report
+
+
+def run_simulation_with_draws(params):
+    """
+    run_monte_carlo_simulation that also returns what it simulated, as
+    (report, base) with base = {'standard_normals', 'growth_innovations', 'stats'},
+    so callers can re-evaluate the same draws (common random numbers) without a second run.
+    """
+    rng = np.random.default_rng(params.get('seed', 42))
+    standard_normals, growth_innovations = draw_standard_normals(params, rng, params['n_simulations'])
+    inputs, results, fcf_projections, weights = evaluate_normals(params, standard_normals, growth_innovations)
+    stats = compute_statistics(results, fcf_projections, params['current_price'], weights)
+    sensitivities = compute_sensitivities(inputs, results, weights)
+    report = build_valuation_report(params, stats, sensitivities, results, weights)
+    return report, {'standard_normals': standard_normals, 'growth_innovations': growth_innovations, 'stats': stats}
+
+
+def run_monte_carlo_simulation(params):
+    return run_simulation_with_draws(params)[0]
@@ -0,0 +1,116 @@
+"""
+Multi-process Monte Carlo runs with zero-copy result arrays.
+
+The parent allocates the per-path arrays (sampled inputs, values per share and
+FCF projections) in multiprocessing.shared_memory. Each worker attaches to the
+same blocks and writes its slice of paths in place, so nothing per-path is
+pickled back. The parent then computes statistics and renders the figures
+directly on numpy views of the shared buffers.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from DCF_main import (
+    SIMULATED_PARAMS, PROJECTION_YEARS, simulate_paths,
+    compute_statistics, compute_sensitivities, build_valuation_report,
+)
+
+# name -> shape as a function of the number of paths; inputs are stored one row per input
+SHARED_ARRAYS = {
+    'inputs': lambda n: (len(SIMULATED_PARAMS), n),
+    'results': lambda n: (n,),
+    'fcf': lambda n: (n, len(PROJECTION_YEARS)),
+    'weights': lambda n: (n,),
+}
+# Arrays stored in params['dtype']; values per share and weights stay float64
+COMPUTE_DTYPE_ARRAYS = ('inputs', 'fcf')
+
+
+def _dtype(key, params):
+    return np.dtype(params.get('dtype', 'float64')) if key in COMPUTE_DTYPE_ARRAYS else np.dtype(np.float64)
+
+
+def _attach(name):
+    """
+    Attach to a block created by the parent. Pool workers share the parent's
+    resource tracker, so the block stays registered exactly once and is
+    unlinked by the parent only.
+    """
+    return shared_memory.SharedMemory(name=name)
+
+
+def _views(blocks, n_paths, params):
+    return {
+        key: np.ndarray(shape(n_paths), dtype=_dtype(key, params), buffer=blocks[key].buf)
+        for key, shape in SHARED_ARRAYS.items()
+    }
+
+
+def _simulate_slice(task):
+    """Worker: simulate paths [start, stop) and write them into the shared arrays"""
+    params, block_names, n_paths, start, stop, seed_sequence = task
+    blocks = {key: _attach(name) for key, name in block_names.items()}
+    try:
+        views = _views(blocks, n_paths, params)
+        rng = np.random.default_rng(seed_sequence)
+        inputs, results, fcf, weights = simulate_paths(params, rng, stop - start, path_offset=start)
+        for i, name in enumerate(SIMULATED_PARAMS):
+            views['inputs'][i, start:stop] = inputs[name]
+        views['results'][start:stop] = results
+        views['fcf'][start:stop] = fcf
+        views['weights'][start:stop] = 1.0 if weights is None else weights
+        del views
+    finally:
+        for shm in blocks.values():
+            shm.close()
+    return stop - start
+
+
+def _report_from_shared(params, blocks, n_paths):
+    """Statistics and figures straight from views of the shared blocks (views die with this frame)"""
+    views = _views(blocks, n_paths, params)
+    inputs = {name: views['inputs'][i] for i, name in enumerate(SIMULATED_PARAMS)}
+    weights = views['weights'] if params.get('importance_sampling') else None
+    stats = compute_statistics(views['results'], views['fcf'], params['current_price'], weights)
+    sensitivities = compute_sensitivities(inputs, views['results'], weights)
+    return build_valuation_report(params, stats, sensitivities, views['results'], weights)
+
+
+def run_parallel_simulation(params, n_workers=None, chunk_size=250_000):
+    """
+    Run params['n_simulations'] paths across worker processes and return the same
+    (fig_es, fig_distribution_only, fig_sensitivity, valuation_summary) tuple as
+    run_monte_carlo_simulation.
+
+    Paths are split into chunks of chunk_size; chunk k draws from child k of
+    SeedSequence(params['seed']), so results do not depend on n_workers. With
+    params['rng'] == 'philox' the draws are keyed by path index instead, so they
+    do not depend on chunk_size either.
+    """
+    n_paths = params['n_simulations']
+    n_workers = n_workers or os.cpu_count() or 1
+    blocks = {}
+    try:
+        for key, shape in SHARED_ARRAYS.items():
+            size = int(np.prod(shape(n_paths))) * _dtype(key, params).itemsize
+            blocks[key] = shared_memory.SharedMemory(create=True, size=size)
+        block_names = {key: shm.name for key, shm in blocks.items()}
+
+        starts = range(0, n_paths, chunk_size)
+        seeds = np.random.SeedSequence(params.get('seed', 42)).spawn(len(starts))
+        tasks = [
+            (params, block_names, n_paths, start, min(start + chunk_size, n_paths), seed)
+            for start, seed in zip(starts, seeds)
+        ]
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+            for _ in executor.map(_simulate_slice, tasks):
+                pass
+
+        return _report_from_shared(params, blocks, n_paths)
+    finally:
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
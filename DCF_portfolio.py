@@ -0,0 +1,171 @@
+"""
+Portfolio-level Monte Carlo across holdings with shared macro draws.
+
+Each path draws the macro factors (risk_free, equity_premium) once and uses the
+same standard normals for every holding, mapped through that holding's own
+mean, std and distribution. The other inputs get their own draws per holding,
+drawn conditionally on the shared macro draws through the holding's correlation
+spec.
+All holdings are then valued in one value_paths call over a (paths x holdings)
+array. The portfolio value per path is the sum of quantity x value per share x
+fx_rate.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from DCF_main import (
+    SIMULATED_PARAMS, PROJECTION_YEARS, sample_inputs, latent_correlation, value_paths,
+    fft_kde, _figure_style, _new_figure, _plot_value_distribution,
+)
+
+MACRO_FACTORS = ('risk_free', 'equity_premium')
+
+
+def _latent_matrix(params):
+    matrix = latent_correlation(params)
+    return np.eye(len(SIMULATED_PARAMS)) if matrix is None else matrix
+
+
+def _stack_draws(holdings, rng, n_paths):
+    """
+    Sample every holding's inputs on shared macro normals; returns a dict of (paths x holdings) arrays.
+
+    The macro latent normals are drawn once (with the macro-macro correlation every
+    holding must share). Each holding's other inputs are then drawn conditionally on
+    them through its own correlation spec: a Cholesky factor with the macro columns
+    ordered first, whose macro block reproduces the shared draws exactly.
+    """
+    names = list(SIMULATED_PARAMS)
+    macro_columns = [names.index(name) for name in MACRO_FACTORS]
+    other_columns = [i for i in range(len(names)) if i not in macro_columns]
+    order = macro_columns + other_columns
+    restore = np.argsort(order)
+    first_stage = PROJECTION_YEARS <= 5
+    any_ar1 = any(h['params'].get('growth_process', 'stage') == 'ar1' for h in holdings.values())
+
+    macro_block = {name: _latent_matrix(h['params'])[np.ix_(macro_columns, macro_columns)] for name, h in holdings.items()}
+    macro_matrix = next(iter(macro_block.values()))
+    for name, block in macro_block.items():
+        if not np.allclose(block, macro_matrix):
+            raise ValueError(f"Holding '{name}' sets a different correlation between the shared macro inputs "
+                             f"({', '.join(MACRO_FACTORS)}); it must be the same for every holding")
+    macro_normals = rng.standard_normal((n_paths, len(MACRO_FACTORS))) @ np.linalg.cholesky(macro_matrix).T
+
+    per_holding = []
+    for holding in holdings.values():
+        params = holding['params']
+        try:
+            factor = np.linalg.cholesky(_latent_matrix(params)[np.ix_(order, order)])
+        except np.linalg.LinAlgError:
+            raise ValueError("correlation matrix must be positive definite") from None
+        # Independent normals whose macro part maps onto the shared macro draws under this factor
+        macro_z = np.linalg.solve(factor[:len(macro_columns), :len(macro_columns)], macro_normals.T).T
+        independent = np.hstack([macro_z, rng.standard_normal((n_paths, len(other_columns)))])
+        standard_normals = (independent @ factor.T)[:, restore]
+        growth_innovations = None
+        if params.get('growth_process', 'stage') == 'ar1':
+            growth_innovations = rng.standard_normal((n_paths, len(PROJECTION_YEARS)))
+        draws = sample_inputs(params, standard_normals, growth_innovations)
+        if any_ar1 and 'growth_path' not in draws:
+            draws['growth_path'] = np.where(first_stage, draws['growth_5y'][:, None], draws['growth_5_10y'][:, None])
+        per_holding.append(draws)
+    return {key: np.stack([draws[key] for draws in per_holding], axis=1) for key in per_holding[0]}
+
+
+def run_portfolio_simulation(holdings, n_paths=10_000, seed=42):
+    """
+    Simulate total intrinsic value of a portfolio.
+
+    holdings maps a name to {'params': DCF params dict, 'quantity': shares held,
+    'fx_rate': optional conversion into the portfolio currency (default 1)}.
+    Returns (fig, summary, contributions, portfolio_values). summary holds the
+    portfolio mean/median/std, VaR/CVaR 95% (value levels, as in
+    compute_statistics), market value and prob_below_market. contributions is a
+    holdings DataFrame with each position's mean value, its share of the
+    portfolio variance (Euler allocation, cov(x_i, V) / var(V)) and its
+    component CVaR (mean position value over the worst 5% of portfolio paths).
+    """
+    rng = np.random.default_rng(seed)
+    draws = _stack_draws(holdings, rng, n_paths)
+
+    def column(key, default=None):
+        return np.array([h['params'].get(key, default) for h in holdings.values()], dtype=float)
+
+    # Company-level scalars as (holdings,) arrays; operating income and tax broadcast over years
+    stacked_params = {
+        'operating_income_base': column('operating_income_base')[:, None],
+        'tax_rate': column('tax_rate', 0.21)[:, None],
+        'cash': column('cash'),
+        'debt': column('debt'),
+        'shares_outstanding': column('shares_outstanding'),
+    }
+    value_per_share, _ = value_paths(draws, stacked_params)
+
+    quantity = np.array([h['quantity'] for h in holdings.values()], dtype=float)
+    fx_rate = np.array([h.get('fx_rate', 1.0) for h in holdings.values()], dtype=float)
+    positions = value_per_share * (quantity * fx_rate)
+    portfolio_values = positions.sum(axis=1)
+    market_value = float(np.sum(column('current_price') * quantity * fx_rate))
+
+    var_95 = np.percentile(portfolio_values, 5)
+    tail = portfolio_values <= var_95
+    portfolio_var = portfolio_values.var()
+    covariances = ((positions - positions.mean(axis=0)) * (portfolio_values - portfolio_values.mean())[:, None]).mean(axis=0)
+    contributions = pd.DataFrame({
+        'quantity': quantity,
+        'mean_value': positions.mean(axis=0),
+        'std_value': positions.std(axis=0),
+        'risk_contribution_pct': covariances / portfolio_var * 100 if portfolio_var > 0 else np.nan,
+        'component_cvar_95': positions[tail].mean(axis=0),
+    }, index=pd.Index(list(holdings), name='holding'))
+
+    summary = {
+        'n_holdings': len(holdings),
+        'n_paths': n_paths,
+        'market_value': market_value,
+        'mean_value': float(portfolio_values.mean()),
+        'median_value': float(np.median(portfolio_values)),
+        'std_value': float(portfolio_values.std()),
+        'var_95': float(var_95),
+        'cvar_95': float(portfolio_values[tail].mean()),
+        'prob_below_market': float(np.mean(portfolio_values < market_value) * 100),
+    }
+
+    with _figure_style():
+        fig = _new_figure(figsize=(10, 6))
+        ax = fig.subplots()
+        _plot_value_distribution(ax, portfolio_values, summary['mean_value'], summary['std_value'], market_value,
+                                 'Portfolio', '', kde=fft_kde(portfolio_values), price_label='Market Value')
+        ax.set_xlabel('Portfolio Intrinsic Value')
+        fig.tight_layout()
+    return fig, summary, contributions, portfolio_values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio DCF Monte Carlo with shared macro draws")
+    parser.add_argument("holdings_file", help="JSON file: {name: {'params': {...}, 'quantity': n, 'fx_rate': x}}")
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="portfolio_output")
+    args = parser.parse_args()
+
+    with open(args.holdings_file, 'r', encoding='utf-8') as f:
+        holdings = json.load(f)
+    fig, summary, contributions, _ = run_portfolio_simulation(holdings, args.paths, args.seed)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output_dir / "portfolio_distribution.png", dpi=150, bbox_inches='tight')
+    contributions.to_csv(output_dir / "contributions.csv")
+    with open(output_dir / "portfolio_summary.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    print(json.dumps({key: round(value, 2) for key, value in summary.items()}, indent=2))
+    print(contributions.to_string(float_format=lambda x: f"{x:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Deterministic stress-test scenarios evaluated as one broadcast computation.
+
+A shock table is a DataFrame with one row per scenario and one column per shocked
+input. Columns are either params mean keys ('risk_free_rate', 'WACC', ...) or
+the factor names in SHOCK_FACTORS ('rates', 'equity_premium', 'growth', ...),
+which move several keys together. Values are additive shifts in decimal units
+(0.02 = +200bp). Every scenario is valued at the shocked means in a single
+value_paths call, and optionally by Monte Carlo on common random numbers, so
+scenario differences carry no sampling noise.
+"""
+import argparse
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+
+from DCF_main import (
+    SIMULATED_PARAMS, draw_standard_normals, evaluate_normals, value_paths, compute_statistics,
+)
+
+# Factor -> params mean keys it shifts (a rate or ERP shock also moves the WACC one for one)
+SHOCK_FACTORS = {
+    'rates': ['risk_free_rate', 'WACC'],
+    'equity_premium': ['equity_risk_premium', 'WACC'],
+    'growth': ['growth_rate_5y', 'growth_rate_5_10y'],
+    'reinvestment': ['reinvestment_rate_5y', 'reinvestment_rate_5_10y'],
+}
+
+MEAN_KEYS = {mean_key: name for name, (mean_key, _) in SIMULATED_PARAMS.items()}
+
+
+def _shifts_by_key(shocks):
+    """Expand factor columns into a (scenarios x params mean key) DataFrame of additive shifts"""
+    shifts = pd.DataFrame(0.0, index=shocks.index, columns=list(MEAN_KEYS))
+    for column in shocks.columns:
+        if column in SHOCK_FACTORS:
+            keys = SHOCK_FACTORS[column]
+        elif column in MEAN_KEYS:
+            keys = [column]
+        else:
+            raise ValueError(f"Unknown shock column '{column}'. Use one of: {', '.join(list(SHOCK_FACTORS) + list(MEAN_KEYS))}")
+        for key in keys:
+            shifts[key] += shocks[column].fillna(0.0).astype(float)
+    return shifts
+
+
+def shock_grid(**factor_levels):
+    """
+    Full-factorial shock table, e.g. shock_grid(rates=[0, 0.02], equity_premium=[0, 0.015],
+    growth=[0, -0.05]) gives 8 combined scenarios named like 'rates +200bp, growth -500bp'.
+    """
+    names = list(factor_levels)
+    rows, index = [], []
+    for levels in itertools.product(*factor_levels.values()):
+        rows.append(levels)
+        label = ', '.join(f"{name} {level * 1e4:+.0f}bp" for name, level in zip(names, levels) if level != 0)
+        index.append(label or 'base')
+    return pd.DataFrame(rows, index=pd.Index(index, name='scenario'), columns=names)
+
+
+def evaluate_scenarios(params, shocks, n_paths=0):
+    """
+    Value every scenario in the shock table against the base params.
+
+    Returns a scenario x metric DataFrame with value_per_share, change_vs_base (%),
+    upside_potential (%) and first/last-year FCF at the shocked means, plus a 'base'
+    row. With n_paths > 0 each scenario is also simulated on the same standard
+    normal draws (common random numbers) and mc_mean_value, mc_median_value,
+    mc_var_95, mc_cvar_95 and mc_prob_undervalued are added.
+    """
+    if 'base' not in shocks.index:
+        shocks = pd.concat([pd.DataFrame(0.0, index=['base'], columns=shocks.columns), shocks])
+    shifts = _shifts_by_key(shocks)
+
+    # One broadcast valuation: each input becomes a (scenarios,) array of shocked means
+    draws = {MEAN_KEYS[key]: params[key] + shifts[key].to_numpy() for key in MEAN_KEYS}
+    values, fcf = value_paths(draws, params)
+    base_value = values[shifts.index.get_loc('base')]
+    current_price = params['current_price']
+    table = pd.DataFrame({
+        'value_per_share': values,
+        'change_vs_base': (values - base_value) / base_value * 100,
+        'upside_potential': (values - current_price) / current_price * 100,
+        'fcf_year_1': fcf[:, 0],
+        'fcf_year_10': fcf[:, -1],
+    }, index=shocks.index)
+
+    if n_paths:
+        standard_normals, growth_innovations = draw_standard_normals(
+            params, np.random.default_rng(params.get('seed', 42)), n_paths)
+        rows = []
+        for scenario, shift in shifts.iterrows():
+            shocked = dict(params, **{key: params[key] + shift[key] for key in MEAN_KEYS})
+            _, results, fcf_paths, weights = evaluate_normals(shocked, standard_normals, growth_innovations)
+            stats = compute_statistics(results, fcf_paths, current_price, weights)
+            rows.append({
+                'mc_mean_value': stats['mean_value'],
+                'mc_median_value': stats['median_value'],
+                'mc_var_95': stats['var_95'],
+                'mc_cvar_95': stats['cvar_95'],
+                'mc_prob_undervalued': stats['prob_undervalued'],
+            })
+        table = table.join(pd.DataFrame(rows, index=shocks.index))
+
+    table.index.name = 'scenario'
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a table of stress-test shocks against a DCF params file")
+    parser.add_argument("params_file", help="JSON file with the simulation params dict")
+    parser.add_argument("shocks_file", help="CSV with a scenario column and one column per shocked input/factor")
+    parser.add_argument("--paths", type=int, default=0, help="Monte Carlo paths per scenario (common random numbers); 0 skips MC")
+    parser.add_argument("--output", default="scenario_results.csv")
+    args = parser.parse_args()
+
+    with open(args.params_file, 'r', encoding='utf-8') as f:
+        params = json.load(f)
+    shocks = pd.read_csv(args.shocks_file, index_col=0)
+    table = evaluate_scenarios(params, shocks, args.paths)
+    table.to_csv(args.output)
+    print(table.to_string(float_format=lambda x: f"{x:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -131,17 +131,26 @@ section.main div.stButton > button[kind="secondary"]:hover{
     unsafe_allow_html=True,
 )
 
-import matplotlib.pyplot as plt
 import io
-import yfinance as yf
 import json
 import os
 import shutil
 import zipfile
 import requests
+import time
+import numpy as np
+import pandas as pd
 from datetime import datetime
 from pathlib import Path
-from DCF_main import run_monte_carlo_simulation
+from DCF_main import (
+    run_simulation_with_draws, SAMPLERS, SIMULATED_PARAMS,
+    evaluate_normals, compute_statistics,
+)
+from DCF_bootstrap import bootstrap_growth_params
+from market_data import RATE_BURST, CachedTicker, get_cache, get_fx, is_missing_symbol_error
+from ticker_database import TICKER_DATABASE
+from cache_warmer import WARMER_ENABLED, start_background_warmer
+from async_data import call_with_timeout, first_valid, run_sync
 
 # --- ANALYSIS STORAGE FUNCTIONS (MUST BE DEFINED FIRST) ---
 # Use absolute path for better persistence
@@ -762,6 +771,7 @@ def display_analysis(analysis_id):
     st.markdown("### Valuation Summary")
     sum_col1, sum_col2 = st.columns(2)
     
+    ess_line = f"<br>Eff. Sample Size: {valuation_summary['Effective Sample Size']}" if 'Effective Sample Size' in valuation_summary else ''
     with sum_col1:
         st.markdown(f"""
             <div class="summary-text">
@@ -777,7 +787,7 @@ def display_analysis(analysis_id):
             <p><strong>Risk Metrics:</strong><br>
             VaR 95%: {valuation_summary['VaR 95%']}<br>
             CVaR 95%: {valuation_summary['CVaR 95%']}<br>
-            Std. Deviation: {valuation_summary['Std. Deviation']}</p>
+            Std. Deviation: {valuation_summary['Std. Deviation']}{ess_line}</p>
             </div>
         """, unsafe_allow_html=True)
     
@@ -872,325 +882,23 @@ else:
 
 st.markdown("---")
 
+@st.cache_resource
+def start_cache_warmer():
+    """One background cache warm-up thread per Streamlit server process (none when DCF_CACHE_WARMER=0)"""
+    if not WARMER_ENABLED:
+        return None
+    return start_background_warmer(tuple(TICKER_DATABASE))
+
+start_cache_warmer()
+
 # --- TICKER SEARCH FUNCTIONALITY ---
 @st.cache_data(ttl=86400)  # Cache for 24 hours
 def get_ticker_database():
     """Get a comprehensive list of major world stocks"""
-    return {
-        # US Stocks
-        'AAPL': 'Apple Inc.',
-        'GOOGL': 'Alphabet Inc. (Class A)',
-        'GOOG': 'Alphabet Inc. (Class C)',
-        'MSFT': 'Microsoft Corporation',
-        'AMZN': 'Amazon.com Inc.',
-        'META': 'Meta Platforms Inc.',
-        'TSLA': 'Tesla Inc.',
-        'NVDA': 'NVIDIA Corporation',
-        'JPM': 'JPMorgan Chase & Co.',
-        'V': 'Visa Inc.',
-        'JNJ': 'Johnson & Johnson',
-        'WMT': 'Walmart Inc.',
-        'MA': 'Mastercard Inc.',
-        'PG': 'Procter & Gamble',
-        'UNH': 'UnitedHealth Group',
-        'HD': 'The Home Depot',
-        'DIS': 'The Walt Disney Company',
-        'BAC': 'Bank of America',
-        'XOM': 'Exxon Mobil',
-        'CVX': 'Chevron Corporation',
-        'ABBV': 'AbbVie Inc.',
-        'PFE': 'Pfizer Inc.',
-        'AVGO': 'Broadcom Inc.',
-        'COST': 'Costco Wholesale',
-        'MRK': 'Merck & Co.',
-        'ABT': 'Abbott Laboratories',
-        'TMO': 'Thermo Fisher Scientific',
-        'ACN': 'Accenture',
-        'CSCO': 'Cisco Systems',
-        'NFLX': 'Netflix Inc.',
-        'AMD': 'Advanced Micro Devices',
-        'INTC': 'Intel Corporation',
-        'CMCSA': 'Comcast Corporation',
-        'ADBE': 'Adobe Inc.',
-        'NKE': 'Nike Inc.',
-        'TXN': 'Texas Instruments',
-        'QCOM': 'Qualcomm Inc.',
-        'HON': 'Honeywell International',
-        'AMGN': 'Amgen Inc.',
-        'SBUX': 'Starbucks Corporation',
-        'GILD': 'Gilead Sciences',
-        'MDT': 'Medtronic',
-        'ISRG': 'Intuitive Surgical',
-        'VZ': 'Verizon Communications',
-        'LMT': 'Lockheed Martin',
-        'RTX': 'Raytheon Technologies',
-        'UPS': 'United Parcel Service',
-        'BMY': 'Bristol-Myers Squibb',
-        'PM': 'Philip Morris International',
-        'T': 'AT&T Inc.',
-        'DE': 'Deere & Company',
-        'CAT': 'Caterpillar Inc.',
-        'GS': 'Goldman Sachs',
-        'MS': 'Morgan Stanley',
-        'BLK': 'BlackRock',
-        'AXP': 'American Express',
-        'SPGI': 'S&P Global',
-        'INTU': 'Intuit Inc.',
-        'BKNG': 'Booking Holdings',
-        'ADI': 'Analog Devices',
-        'AMAT': 'Applied Materials',
-        'KLAC': 'KLA Corporation',
-        'LRCX': 'Lam Research',
-        'CDNS': 'Cadence Design Systems',
-        'SNPS': 'Synopsys',
-        'CRWD': 'CrowdStrike',
-        'PANW': 'Palo Alto Networks',
-        'FTNT': 'Fortinet',
-        'ZS': 'Zscaler',
-        'NET': 'Cloudflare',
-        'DDOG': 'Datadog',
-        'MDB': 'MongoDB',
-        'NOW': 'ServiceNow',
-        'TEAM': 'Atlassian',
-        'WDAY': 'Workday',
-        'VEEV': 'Veeva Systems',
-        'ZM': 'Zoom Video Communications',
-        'DOCN': 'DigitalOcean',
-        'GTLB': 'GitLab',
-        'ESTC': 'Elastic',
-        'FROG': 'JFrog',
-        'PATH': 'UiPath',
-        'BILL': 'Bill.com',
-        'COUP': 'Coupa Software',
-        'OKTA': 'Okta',
-        'SPLK': 'Splunk',
-        'QLYS': 'Qualys',
-        'RPD': 'Rapid7',
-        'TENB': 'Tenable',
-        'VRNS': 'Varonis Systems',
-        'RDWR': 'Radware',
-        'CHKP': 'Check Point Software',
-        'QLYS': 'Qualys',
-        'RDWR': 'Radware',
-        'CHKP': 'Check Point Software',
-        'FTNT': 'Fortinet',
-        'ZS': 'Zscaler',
-        'NET': 'Cloudflare',
-        'DDOG': 'Datadog',
-        'MDB': 'MongoDB',
-        'NOW': 'ServiceNow',
-        'TEAM': 'Atlassian',
-        'WDAY': 'Workday',
-        'VEEV': 'Veeva Systems',
-        'ZM': 'Zoom Video Communications',
-        'DOCN': 'DigitalOcean',
-        'GTLB': 'GitLab',
-        'ESTC': 'Elastic',
-        'FROG': 'JFrog',
-        'PATH': 'UiPath',
-        'BILL': 'Bill.com',
-        'COUP': 'Coupa Software',
-        'OKTA': 'Okta',
-        'SPLK': 'Splunk',
-        'QLYS': 'Qualys',
-        'RPD': 'Rapid7',
-        'TENB': 'Tenable',
-        'VRNS': 'Varonis Systems',
-        'RDWR': 'Radware',
-        'CHKP': 'Check Point Software',
-        # European Stocks
-        'NVO': 'Novo Nordisk A/S',
-        'NVO.CO': 'Novo Nordisk A/S (Copenhagen)',
-        'ASML': 'ASML Holding N.V.',
-        'ASML.AS': 'ASML Holding (Amsterdam)',
-        'SAP': 'SAP SE',
-        'SAP.DE': 'SAP SE (Germany)',
-        'SHEL': 'Shell plc',
-        'SHEL.L': 'Shell plc (London)',
-        'BP': 'BP p.l.c.',
-        'BP.L': 'BP p.l.c. (London)',
-        'GSK': 'GSK plc',
-        'GSK.L': 'GSK plc (London)',
-        'AZN': 'AstraZeneca',
-        'AZN.L': 'AstraZeneca (London)',
-        'UL': 'Unilever',
-        'ULVR.L': 'Unilever (London)',
-        'DEO': 'Diageo',
-        'DEO.L': 'Diageo (London)',
-        'RDS-A': 'Royal Dutch Shell',
-        'RDS-B': 'Royal Dutch Shell',
-        'BTI': 'British American Tobacco',
-        'BTI.L': 'British American Tobacco (London)',
-        'RIO': 'Rio Tinto',
-        'RIO.L': 'Rio Tinto (London)',
-        'BHP': 'BHP Group',
-        'BHP.L': 'BHP Group (London)',
-        'GLEN.L': 'Glencore (London)',
-        'NG': 'National Grid',
-        'NG.L': 'National Grid (London)',
-        'VOD': 'Vodafone',
-        'VOD.L': 'Vodafone (London)',
-        'TSCO.L': 'Tesco (London)',
-        'SBRY.L': 'Sainsbury\'s (London)',
-        'MKS.L': 'Marks & Spencer (London)',
-        'NXT.L': 'Next (London)',
-        'JD.L': 'JD Sports (London)',
-        'FRES.L': 'Fresnillo (London)',
-        'POLY.L': 'Polymetal (London)',
-        'AAL.L': 'Anglo American (London)',
-        'ANTO.L': 'Antofagasta (London)',
-        'EVR.L': 'Evercore (London)',
-        'FERG.L': 'Ferguson (London)',
-        'FOUR.L': '4imprint (London)',
-        'GFTU.L': 'Grafton (London)',
-        'HWDN.L': 'Howden Joinery (London)',
-        'IHG.L': 'InterContinental Hotels (London)',
-        'JD.L': 'JD Sports Fashion (London)',
-        'KGF.L': 'Kingfisher (London)',
-        'LAND.L': 'Land Securities (London)',
-        'LGEN.L': 'Legal & General (London)',
-        'LLOY.L': 'Lloyds Banking (London)',
-        'MKS.L': 'Marks & Spencer (London)',
-        'NXT.L': 'Next (London)',
-        'OCDO.L': 'Ocado (London)',
-        'PSN.L': 'Persimmon (London)',
-        'RTO.L': 'Rentokil Initial (London)',
-        'SBRY.L': 'Sainsbury\'s (London)',
-        'SGE.L': 'Sage Group (London)',
-        'SGRO.L': 'Segro (London)',
-        'SN.L': 'Smith & Nephew (London)',
-        'SPX.L': 'Spirax-Sarco Engineering (London)',
-        'SSE.L': 'SSE (London)',
-        'STAN.L': 'Standard Chartered (London)',
-        'STJ.L': 'St. James\'s Place (London)',
-        'SVT.L': 'Severn Trent (London)',
-        'TSCO.L': 'Tesco (London)',
-        'TW.L': 'Taylor Wimpey (London)',
-        'ULVR.L': 'Unilever (London)',
-        'VOD.L': 'Vodafone (London)',
-        'WEIR.L': 'Weir Group (London)',
-        'WTB.L': 'Whitbread (London)',
-        # Asian Stocks
-        'TSM': 'Taiwan Semiconductor',
-        'TSM.TW': 'Taiwan Semiconductor (Taiwan)',
-        'BABA': 'Alibaba Group',
-        'BABA.HK': 'Alibaba Group (Hong Kong)',
-        'JD': 'JD.com',
-        'JD.HK': 'JD.com (Hong Kong)',
-        'PDD': 'Pinduoduo',
-        'PDD.HK': 'Pinduoduo (Hong Kong)',
-        'BIDU': 'Baidu',
-        'BIDU.HK': 'Baidu (Hong Kong)',
-        'NIO': 'NIO Inc.',
-        'NIO.HK': 'NIO Inc. (Hong Kong)',
-        'XPEV': 'XPeng',
-        'XPEV.HK': 'XPeng (Hong Kong)',
-        'LI': 'Li Auto',
-        'LI.HK': 'Li Auto (Hong Kong)',
-        'TME': 'Tencent Music',
-        'TME.HK': 'Tencent Music (Hong Kong)',
-        'NTES': 'NetEase',
-        'NTES.HK': 'NetEase (Hong Kong)',
-        'WB': 'Weibo',
-        'WB.HK': 'Weibo (Hong Kong)',
-        'DOYU': 'DouYu',
-        'DOYU.HK': 'DouYu (Hong Kong)',
-        'HUYA': 'Huya',
-        'HUYA.HK': 'Huya (Hong Kong)',
-        'YY': 'YY Inc.',
-        'YY.HK': 'YY Inc. (Hong Kong)',
-        'VIPS': 'Vipshop',
-        'VIPS.HK': 'Vipshop (Hong Kong)',
-        'WB': 'Weibo',
-        'WB.HK': 'Weibo (Hong Kong)',
-        # Canadian Stocks
-        'SHOP': 'Shopify',
-        'SHOP.TO': 'Shopify (Toronto)',
-        'RY': 'Royal Bank of Canada',
-        'RY.TO': 'Royal Bank of Canada (Toronto)',
-        'TD': 'TD Bank',
-        'TD.TO': 'TD Bank (Toronto)',
-        'BNS': 'Bank of Nova Scotia',
-        'BNS.TO': 'Bank of Nova Scotia (Toronto)',
-        'BMO': 'Bank of Montreal',
-        'BMO.TO': 'Bank of Montreal (Toronto)',
-        'CM': 'Canadian Imperial Bank',
-        'CM.TO': 'Canadian Imperial Bank (Toronto)',
-        'ENB': 'Enbridge',
-        'ENB.TO': 'Enbridge (Toronto)',
-        'TRP': 'TC Energy',
-        'TRP.TO': 'TC Energy (Toronto)',
-        'CP': 'Canadian Pacific',
-        'CP.TO': 'Canadian Pacific (Toronto)',
-        'CNR': 'Canadian National Railway',
-        'CNR.TO': 'Canadian National Railway (Toronto)',
-        'ATD': 'Alimentation Couche-Tard',
-        'ATD.TO': 'Alimentation Couche-Tard (Toronto)',
-        'WCN': 'Waste Connections',
-        'WCN.TO': 'Waste Connections (Toronto)',
-        'FNV': 'Franco-Nevada',
-        'FNV.TO': 'Franco-Nevada (Toronto)',
-        'WPM': 'Wheaton Precious Metals',
-        'WPM.TO': 'Wheaton Precious Metals (Toronto)',
-        'NTR': 'Nutrien',
-        'NTR.TO': 'Nutrien (Toronto)',
-        'SU': 'Suncor Energy',
-        'SU.TO': 'Suncor Energy (Toronto)',
-        'IMO': 'Imperial Oil',
-        'IMO.TO': 'Imperial Oil (Toronto)',
-        'CVE': 'Cenovus Energy',
-        'CVE.TO': 'Cenovus Energy (Toronto)',
-        'MEG': 'MEG Energy',
-        'MEG.TO': 'MEG Energy (Toronto)',
-        'TOU': 'Tourmaline Oil',
-        'TOU.TO': 'Tourmaline Oil (Toronto)',
-        'ARX': 'ARC Resources',
-        'ARX.TO': 'ARC Resources (Toronto)',
-        'PPL': 'Pembina Pipeline',
-        'PPL.TO': 'Pembina Pipeline (Toronto)',
-        'KEY': 'Keyera',
-        'KEY.TO': 'Keyera (Toronto)',
-        'IPL': 'Inter Pipeline',
-        'IPL.TO': 'Inter Pipeline (Toronto)',
-        'PXT': 'Parex Resources',
-        'PXT.TO': 'Parex Resources (Toronto)',
-        'VET': 'Vermilion Energy',
-        'VET.TO': 'Vermilion Energy (Toronto)',
-        'BAY': 'Baytex Energy',
-        'BAY.TO': 'Baytex Energy (Toronto)',
-        'CR': 'Crew Energy',
-        'CR.TO': 'Crew Energy (Toronto)',
-        'GTE': 'Gran Tierra Energy',
-        'GTE.TO': 'Gran Tierra Energy (Toronto)',
-        'TVE': 'Tamarack Valley Energy',
-        'TVE.TO': 'Tamarack Valley Energy (Toronto)',
-        'WCP': 'Whitecap Resources',
-        'WCP.TO': 'Whitecap Resources (Toronto)',
-        'TOU': 'Tourmaline Oil',
-        'TOU.TO': 'Tourmaline Oil (Toronto)',
-        'ARX': 'ARC Resources',
-        'ARX.TO': 'ARC Resources (Toronto)',
-        'PPL': 'Pembina Pipeline',
-        'PPL.TO': 'Pembina Pipeline (Toronto)',
-        'KEY': 'Keyera',
-        'KEY.TO': 'Keyera (Toronto)',
-        'IPL': 'Inter Pipeline',
-        'IPL.TO': 'Inter Pipeline (Toronto)',
-        'PXT': 'Parex Resources',
-        'PXT.TO': 'Parex Resources (Toronto)',
-        'VET': 'Vermilion Energy',
-        'VET.TO': 'Vermilion Energy (Toronto)',
-        'BAY': 'Baytex Energy',
-        'BAY.TO': 'Baytex Energy (Toronto)',
-        'CR': 'Crew Energy',
-        'CR.TO': 'Crew Energy (Toronto)',
-        'GTE': 'Gran Tierra Energy',
-        'GTE.TO': 'Gran Tierra Energy (Toronto)',
-        'TVE': 'Tamarack Valley Energy',
-        'TVE.TO': 'Tamarack Valley Energy (Toronto)',
-        'WCP': 'Whitecap Resources',
-        'WCP.TO': 'Whitecap Resources (Toronto)',
-    }
+    return TICKER_DATABASE
+
+# Seconds a ticker lookup may take before the search gives up on it
+SEARCH_TIMEOUT = 10.0
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
 def search_tickers(query):
@@ -1215,8 +923,7 @@ def search_tickers(query):
     if len(results) < 5 and len(query_upper) >= 1:
         # Try the query as a ticker directly
         try:
-            tk = yf.Ticker(query_upper)
-            info = tk.info
+            info = call_with_timeout(getattr, CachedTicker(query_upper), "info", timeout=SEARCH_TIMEOUT)
             if info and len(info) > 0:
                 name = info.get('longName') or info.get('shortName') or query_upper
                 results.insert(0, {
@@ -1238,13 +945,209 @@ def search_tickers(query):
     return unique_results[:20]  # Limit to 20 results
 
 # --- LÓGICA DE RECUPERACIÓN ---
+# Seconds fetch_data waits for one ticker variant before treating it as a miss
+FETCH_TIMEOUT = 30.0
+# Suffix variants probed at once; each probe is one request, so all of them fit in the limiter's burst
+FETCH_PROBE_CONCURRENCY = RATE_BURST
+
+
+# Statement rows for the statement-tier fields, in order of preference
+STATEMENT_ROWS = {
+    'cash': ['Cash Cash Equivalents And Short Term Investments', 'Cash And Cash Equivalents'],
+    'debt': ['Total Debt'],
+    'ebit': ['EBIT', 'Operating Income'],
+}
+# (statement attribute, fields it can supply, periods summed) in the order they are tried
+STATEMENT_TIERS = [
+    ('quarterly_balance_sheet', ('cash', 'debt'), 1),
+    ('balance_sheet', ('cash', 'debt'), 1),
+    ('quarterly_income_stmt', ('ebit',), 4),
+    ('income_stmt', ('ebit',), 1),
+]
+FETCH_FIELDS = ('price', 'shares', 'cash', 'ebit', 'debt')
+
+
+def _latest_statement_value(statement, rows, periods=1):
+    """Sum of the latest `periods` values of the first available row, or None"""
+    if statement is None or statement.empty:
+        return None
+    for row in rows:
+        if row in statement.index:
+            values = pd.to_numeric(statement.loc[row], errors='coerce').dropna().sort_index(ascending=False)
+            if len(values) >= periods:
+                return float(values.iloc[:periods].sum())
+    return None
+
+
+def _fetch_variant(ticker_to_try, target_curr):
+    """
+    Fetch financial data for one ticker variant (e.g. "NVO.CO") in tiers, each
+    consulted only for the fields still missing:
+      1. fast_info: price, shares and currency (history for the price if needed);
+         without a price the variant is a miss and nothing else is fetched
+      2. statements: cash and debt (latest balance sheet), EBIT (TTM of the quarters)
+      3. info: anything still missing
+    Returns the fetch_data dict, with data["sources"] naming the tier behind each
+    field, or None if yfinance definitively has no usable data for the variant.
+    Transient failures (429s, network errors) are raised instead, so callers do
+    not mistake them for a missing listing.
+    """
+    try:
+        # Create ticker object
+        tk = CachedTicker(ticker_to_try)
+        values, sources = {}, {}
+        transient_errors = []
+        
+        def swallow(error):
+            # "No such symbol" errors are a definitive miss; anything else only matters if no price is found
+            if not is_missing_symbol_error(error):
+                transient_errors.append(error)
+        
+        def take(field, value, source):
+            if field in values:
+                return
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return
+            if np.isfinite(value) and value > 0:
+                values[field] = value
+                sources[field] = source
+        
+        # Tier 1: fast_info (one lightweight call)
+        try:
+            fast_info = tk.fast_info
+        except Exception as error:
+            swallow(error)
+            fast_info = {}
+        if fast_info.get('quoteType') == 'NONE':
+            return None
+        for field in ["lastPrice", "previousClose"]:
+            take("price", fast_info.get(field), "fast_info")
+        take("shares", fast_info.get("shares"), "fast_info")
+        if "shares" not in values and "price" in values and fast_info.get("marketCap"):
+            take("shares", fast_info["marketCap"] / values["price"], "fast_info")
+        native_curr = fast_info.get("currency")
+        
+        # Price from history if fast_info has none
+        if "price" not in values:
+            try:
+                hist = tk.history(period="5d")
+                if not hist.empty and len(hist) > 0:
+                    take("price", hist['Close'].iloc[-1], "history")
+            except Exception as error:
+                swallow(error)
+        
+        # No price: the variant is unusable, so skip the statement and info requests
+        if "price" not in values:
+            if transient_errors:
+                raise transient_errors[0]
+            return None
+        
+        # Tier 2: statements for cash, debt and EBIT
+        for attribute, fields, periods in STATEMENT_TIERS:
+            missing = [field for field in fields if field not in values]
+            if not missing:
+                continue
+            try:
+                statement = getattr(tk, attribute)
+            except Exception as error:
+                swallow(error)
+                continue
+            for field in missing:
+                take(field, _latest_statement_value(statement, STATEMENT_ROWS[field], periods), attribute)
+        
+        # Tier 3: the full info payload, only for what is still missing
+        info = {}
+        if native_curr is None or any(field not in values for field in FETCH_FIELDS):
+            try:
+                info = tk.info or {}
+            except Exception as error:
+                swallow(error)
+                info = {}
+            # Check for common error indicators in yfinance response
+            if 'error' in info or 'Error' in info or info.get('quoteType') == 'NONE':
+                info = {}
+            for field in ["sharesOutstanding", "impliedSharesOutstanding", "floatShares"]:
+                take("shares", info.get(field), "info")
+            if "shares" not in values and "price" in values and info.get("marketCap"):
+                take("shares", info["marketCap"] / values["price"], "info")
+            take("cash", info.get("totalCash"), "info")
+            if "shares" in values and info.get("totalCashPerShare"):
+                take("cash", info["totalCashPerShare"] * values["shares"], "info")
+            for field in ["ebitda", "operatingIncome", "ebit", "operatingCashflow"]:
+                if info.get(field):
+                    take("ebit", info[field] * 0.85, "info")
+            for field in ["totalDebt", "longTermDebt"]:
+                take("debt", info.get(field), "info")
+            native_curr = native_curr or info.get("currency")
+        native_curr = native_curr or "USD"
+        
+        # Statement and info figures are reported in financialCurrency. It comes from info when that
+        # was loaded above; otherwise the month-long cached profile is read, and only when statement
+        # values were actually used
+        financial_curr = info.get("financialCurrency")
+        if financial_curr is None and any(sources.get(field) not in (None, "info") for field in ("cash", "ebit", "debt")):
+            try:
+                financial_curr = tk.profile.get("financialCurrency")
+            except Exception:
+                pass
+        financial_curr = financial_curr or native_curr
+        
+        # Build data dictionary (shares default to 1 billion if they could not be determined; user can adjust)
+        data = {
+            "price": values["price"],
+            "shares": values.get("shares", 1e9) / 1e6,  # Convert to millions
+            "cash": values.get("cash", 0) / 1e6,
+            "ebit": values.get("ebit", 0) / 1e6,
+            "debt": values.get("debt", 0) / 1e6,
+        }
+        
+        # Handle currency conversion through the shared FX matrix. The price is quoted in
+        # `currency` (possibly a minor unit such as GBp), the statements in `financialCurrency`.
+        # If a rate is unavailable, values stay in their native currency
+        fx = get_fx()
+        price_rate = fx.rate(native_curr, target_curr)
+        if price_rate:
+            data["price"] *= price_rate
+        financial_rate = fx.rate(financial_curr, target_curr)
+        if financial_rate:
+            for k in ["cash", "ebit", "debt"]:
+                data[k] *= financial_rate
+        
+        data["sources"] = {field: sources.get(field, "default") for field in FETCH_FIELDS}
+        return data
+    except Exception as error:
+        if is_missing_symbol_error(error):
+            return None
+        raise
+
+
+def _probe_variant(ticker_to_try):
+    """Last price of a ticker variant from at most one lightweight request, or None if yfinance has none"""
+    try:
+        price = float(CachedTicker(ticker_to_try).last_price())
+    except (KeyError, TypeError, ValueError):
+        # Chart metadata without a price
+        return None
+    except Exception as error:
+        if is_missing_symbol_error(error):
+            return None
+        raise
+    return price if np.isfinite(price) and price > 0 else None
+
+
 def fetch_data(ticker, target_curr):
     """
     Fetch financial data for a ticker using yfinance.
     Returns a dict with price, shares, cash, ebit, debt or None if failed.
-    """
-    import time
     
+    A known listing is fetched directly. Otherwise each variant is probed with a
+    single request (its last price): the bare symbol first, then all exchange
+    suffixes together. Only the first variant with a price runs the full tiered
+    fetch. A miss therefore costs about two requests' time while the rate limiter
+    has burst tokens to spare; once it is throttling, the probes wait their turn.
+    """
     # Clean the ticker
     ticker = ticker.strip().upper()
     if not ticker:
@@ -1265,237 +1168,121 @@ def fetch_data(ticker, target_curr):
             f"{ticker}.AS",  # Amsterdam
         ])
     
-    last_error = None
-    for ticker_to_try in ticker_variants:
+    # Go straight to the listing this ticker resolved to before
+    cache = get_cache()
+    known = cache.resolved_listing(ticker)
+    if known:
         try:
-            # Create ticker object
-            tk = yf.Ticker(ticker_to_try)
-            
-            # First, try to get price from history (more reliable)
-            price_from_history = None
-            try:
-                hist = tk.history(period="5d")
-                if not hist.empty and len(hist) > 0:
-                    price_from_history = float(hist['Close'].iloc[-1])
-            except:
-                pass
-            
-            # Try to get info - this can sometimes fail or return empty dict
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.1)
-            info = None
-            try:
-                info = tk.info
-            except:
-                # If info fails, we can still use history data
-                if price_from_history and price_from_history > 0:
-                    # Return minimal data with price from history
-                    return {
-                        "price": price_from_history,
-                        "shares": 1e9,  # Default
-                        "cash": 0,
-                        "ebit": 0,
-                        "debt": 0,
-                    }
-                continue
-            
-            # If info is empty or invalid, try fast_info as fallback
-            if not info or (isinstance(info, dict) and len(info) < 5):
-                try:
-                    fast_info = tk.fast_info
-                    if fast_info:
-                        # Merge fast_info into info if available
-                        if isinstance(info, dict):
-                            info.update(fast_info)
-                        else:
-                            info = fast_info
-                except:
-                    pass
-            
-            # Check if info is valid - sometimes yfinance returns empty dict or dict with error
-            if not info:
-                continue
-                
-            # Check for common error indicators in yfinance response
-            if isinstance(info, dict):
-                # Check for explicit error fields
-                if 'error' in info or 'Error' in info:
-                    continue
-                    
-                # Check if we have at least some basic info (but be lenient - some tickers have minimal data)
-                if len(info) < 3:
-                    continue
-                    
-                # Check for quoteType to ensure it's a valid security
-                # But don't fail if it's missing - some exchanges don't provide this
-                if 'quoteType' in info and info.get('quoteType') == 'NONE':
-                    continue
-            
-            # Try to get price - use history first if available, then try info fields
-            price = price_from_history
-            
-            if price is None or price <= 0:
-                # Try info fields
-                price_fields = [
-                    "currentPrice",
-                    "regularMarketPrice", 
-                    "previousClose",
-                    "regularMarketPreviousClose",
-                    "open",
-                    "ask",
-                    "bid",
-                    "lastPrice"
-                ]
-                
-                for field in price_fields:
-                    if info and field in info and info[field] is not None:
-                        price_val = info[field]
-                        if isinstance(price_val, (int, float)) and price_val > 0:
-                            price = float(price_val)
-                            break
-            
-            # Final fallback: try history again if we still don't have price
-            if (price is None or price <= 0) and not price_from_history:
-                try:
-                    hist = tk.history(period="1d")
-                    if not hist.empty and len(hist) > 0:
-                        price = float(hist['Close'].iloc[-1])
-                except:
-                    pass
-            
-            if price is None or price <= 0:
-                continue
-            
-            # Get currency
-            native_curr = info.get("currency", "USD")
-            if not native_curr:
-                native_curr = "USD"
-            
-            # Get shares outstanding - try multiple methods
-            shares = None
-            
-            # Method 1: Direct field
-            shares_fields = [
-                "sharesOutstanding",
-                "impliedSharesOutstanding", 
-                "sharesShort",
-                "floatShares",
-                "sharesShortPriorMonth"
-            ]
-            
-            for field in shares_fields:
-                if field in info and info[field] is not None:
-                    shares_val = info[field]
-                    if isinstance(shares_val, (int, float)) and shares_val > 0:
-                        shares = float(shares_val)
-                        break
-            
-            # Method 2: Calculate from market cap
-            if shares is None or shares <= 0:
-                market_cap = info.get("marketCap") or info.get("enterpriseValue")
-                if market_cap and isinstance(market_cap, (int, float)) and market_cap > 0 and price > 0:
-                    shares = float(market_cap) / price
-            
-            # Method 3: Use shares outstanding from financials
-            if (shares is None or shares <= 0) and 'sharesOutstanding' in info:
-                shares_val = info['sharesOutstanding']
-                if isinstance(shares_val, (int, float)) and shares_val > 0:
-                    shares = float(shares_val)
-            
-            # If shares still not found, use a default or calculate from market cap
-            if shares is None or shares <= 0:
-                # Try one more time with marketCap
-                market_cap = info.get("marketCap")
-                if market_cap and price > 0:
-                    shares = market_cap / price
-                # If still no shares, use a default (user can adjust)
-                if shares is None or shares <= 0:
-                    # Default to 1 billion shares if we can't determine
-                    shares = 1e9
-            
-            # Get cash - try multiple fields
-            cash = 0
-            cash_fields = ["totalCash", "totalCashPerShare", "cash", "cashAndCashEquivalents"]
-            for field in cash_fields:
-                if field in info and info[field] is not None:
-                    cash_val = info[field]
-                    if isinstance(cash_val, (int, float)) and cash_val >= 0:
-                        if "PerShare" in field and shares > 0:
-                            cash = float(cash_val) * shares
-                        else:
-                            cash = float(cash_val)
-                        break
-            
-            # Get EBITDA/Operating Income
-            ebitda = 0
-            ebitda_fields = ["ebitda", "operatingIncome", "ebit", "operatingCashflow"]
-            for field in ebitda_fields:
-                if field in info and info[field] is not None:
-                    ebitda_val = info[field]
-                    if isinstance(ebitda_val, (int, float)):
-                        ebitda = float(ebitda_val)
-                        break
-            
-            # Get debt
-            debt = 0
-            debt_fields = ["totalDebt", "totalDebt", "longTermDebt", "debt"]
-            for field in debt_fields:
-                if field in info and info[field] is not None:
-                    debt_val = info[field]
-                    if isinstance(debt_val, (int, float)) and debt_val >= 0:
-                        debt = float(debt_val)
-                        break
-            
-            # Build data dictionary
-            data = {
-                "price": price,
-                "shares": shares / 1e6,  # Convert to millions
-                "cash": cash / 1e6 if cash > 0 else 0,
-                "ebit": (ebitda * 0.85) / 1e6 if ebitda > 0 else 0,
-                "debt": debt / 1e6 if debt > 0 else 0,
-            }
-            
-            # Validate we have at least price and shares
-            if data["price"] > 0 and data["shares"] > 0:
-                # Handle currency conversion
-                if target_curr.upper() != native_curr.upper():
-                    try:
-                        rate_ticker = yf.Ticker(f"{native_curr}{target_curr}=X")
-                        time.sleep(0.1)  # Small delay
-                        rate_history = rate_ticker.history(period="1d")
-                        if not rate_history.empty and len(rate_history) > 0:
-                            rate = rate_history['Close'].iloc[-1]
-                            if rate and rate > 0:
-                                for k in ["price", "cash", "ebit", "debt"]: 
-                                    data[k] *= rate
-                    except Exception as conv_error:
-                        # If currency conversion fails, continue with native currency
-                        pass
-                
+            data = call_with_timeout(_fetch_variant, known[0], target_curr, timeout=FETCH_TIMEOUT)
+        except Exception:
+            # Timeouts and transient errors say nothing about the listing; keep it and probe the rest
+            data = None
+        else:
+            if data is not None:
                 return data
-            else:
-                # Last resort: try to get price from history if info failed
-                if data["price"] <= 0:
-                    try:
-                        hist = tk.history(period="5d")
-                        if not hist.empty and len(hist) > 0:
-                            price_from_hist = float(hist['Close'].iloc[-1])
-                            if price_from_hist > 0:
-                                data["price"] = price_from_hist
-                                # If we now have price and shares, return
-                                if data["shares"] > 0:
-                                    return data
-                    except:
-                        pass
-                continue
-                
-        except Exception as e:
-            last_error = str(e)
-            # Continue to next variant
+            # A definitive miss: the listing is gone, resolve again
+            cache.forget_resolution(ticker)
+    
+    # Skip variants that failed recently; if all did, fail fast
+    failed = cache.failed_listings(ticker_variants)
+    ticker_variants = [variant for variant in ticker_variants if variant not in failed]
+    if not ticker_variants:
+        return None
+    
+    # Probe the preferred variant on its own first; only on a miss fan out to the rest at once
+    # (each with a hard timeout), taking the first one with a price in priority order
+    for group in (ticker_variants[:1], ticker_variants[1:]):
+        if not group:
             continue
+        index, _, empty = run_sync(first_valid([(_probe_variant, variant) for variant in group],
+                                               timeout=FETCH_TIMEOUT, limit=FETCH_PROBE_CONCURRENCY))
+        # Only variants that definitively had no price are negative-cached; timeouts and transient errors are retried next time
+        cache.record_failures([group[i] for i in empty])
+        if index is not None:
+            break
+    else:
+        # If all variants failed, return None
+        return None
     
-    # If all variants failed, return None
-    return None
+    # The full tiered fetch runs for the winning variant only
+    variant = group[index]
+    try:
+        data = call_with_timeout(_fetch_variant, variant, target_curr, timeout=FETCH_TIMEOUT)
+    except Exception:
+        return None
+    if data is not None:
+        # The fetch above cached fast_info, so its currency costs no request
+        cache.record_resolution(ticker, variant, CachedTicker(variant).fast_info.get("currency"))
+    return data
+
+# Labels and natural bounds for the simulated inputs (used by the distribution selectors)
+DISTRIBUTION_LABELS = {
+    'growth_5y': "Growth 5y", 'growth_5_10y': "Growth 5-10y",
+    'risk_free': "Risk Free", 'equity_premium': "Equity Premium", 'WACC': "WACC",
+    'reinv_5y': "Reinv 5y", 'reinv_5_10y': "Reinv 5-10y",
+}
+DISTRIBUTION_BOUNDS = {
+    'growth_5y': (-1.0, None), 'growth_5_10y': (-1.0, None),
+    'risk_free': (0.0, None), 'equity_premium': (0.0, None), 'WACC': (0.0, None),
+    'reinv_5y': (0.0, 1.0), 'reinv_5_10y': (0.0, 1.0),
+}
+CORRELATION_PAIRS = {
+    ('growth_5y', 'growth_5_10y'): "Corr Growth 5y / 5-10y",
+    ('growth_5y', 'WACC'): "Corr Growth 5y / WACC",
+    ('risk_free', 'WACC'): "Corr Risk Free / WACC",
+    ('risk_free', 'equity_premium'): "Corr Risk Free / Equity Premium",
+}
+
+
+def store_whatif_base(params, base):
+    """Keep the draws and statistics of a finished run (from run_simulation_with_draws) for the what-if sliders"""
+    st.session_state.whatif_base = dict(base, params=params)
+    # New base run: sliders start again from its means and stds
+    for key in [key for key in st.session_state if key.startswith('whatif_slider_')]:
+        del st.session_state[key]
+
+
+def display_whatif():
+    """Live what-if sliders re-evaluating the cached draws of the last run (common random numbers)"""
+    base = st.session_state.get('whatif_base')
+    if not base:
+        return
+    params = base['params']
+    currency = params.get('currency', 'USD')
+    st.markdown("### What-if")
+    st.caption(f"Re-values the {params['n_simulations']:,} cached paths of the last {params['company_name']} run with new means and stds. "
+               "The random draws are held fixed, so differences come from the inputs only.")
+
+    overrides = {}
+    col1, col2 = st.columns(2)
+    for i, (sim_name, label) in enumerate(DISTRIBUTION_LABELS.items()):
+        mean_key, std_key = SIMULATED_PARAMS[sim_name]
+        mean, std = params[mean_key] * 100, params[std_key] * 100
+        with (col1 if i % 2 == 0 else col2):
+            overrides[mean_key] = st.slider(f"{label} mean (%)", min_value=round(mean - 10.0, 1), max_value=round(mean + 10.0, 1),
+                                            value=round(mean, 1), step=0.1, key=f"whatif_slider_{mean_key}") / 100
+            overrides[std_key] = st.slider(f"{label} std (%)", min_value=0.0, max_value=round(max(3 * std, 1.0), 1),
+                                           value=round(std, 1), step=0.1, key=f"whatif_slider_{std_key}") / 100
+
+    # Sliders still at their (rounded) defaults keep the exact base inputs, so an untouched panel shows zero deltas
+    whatif = dict(params, **{key: value for key, value in overrides.items()
+                             if round(value * 100, 1) != round(params[key] * 100, 1)})
+    start = time.perf_counter()
+    try:
+        _, results, fcf, weights = evaluate_normals(whatif, base['standard_normals'], base['growth_innovations'])
+    except ValueError as e:
+        st.error(f"❌ Invalid what-if inputs: {e}")
+        return
+    stats = compute_statistics(results, fcf, whatif['current_price'], weights)
+    elapsed = time.perf_counter() - start
+
+    metric_cols = st.columns(5)
+    for col, (label, key) in zip(metric_cols, [("Mean Value", 'mean_value'), ("Median Value", 'median_value'),
+                                               ("VaR 95%", 'var_95'), ("CVaR 95%", 'cvar_95')]):
+        col.metric(label, f"{stats[key]:.2f} {currency}", delta=f"{stats[key] - base['stats'][key]:+.2f}")
+    metric_cols[4].metric("Undervaluation", f"{stats['prob_undervalued']:.1f}%",
+                          delta=f"{stats['prob_undervalued'] - base['stats']['prob_undervalued']:+.1f} pp")
+    st.caption(f"Re-evaluated in {elapsed * 1000:.0f} ms")
 
 if 'st_vals' not in st.session_state:
     st.session_state.st_vals = {"price": 168.4, "shares": 12700.0, "cash": 96000.0, "ebit": 154740.0, "debt": 22000.0}
@@ -1546,6 +1333,7 @@ with st.sidebar:
             try:
                 res = fetch_data(t_input, target_currency)
                 if res: 
+                    st.session_state.fetch_sources = res.pop("sources", {})
                     st.session_state.st_vals.update(res)
                     st.success(f"✅ Data fetched for {t_input}! Values updated.")
                     st.rerun()
@@ -1554,8 +1342,7 @@ with st.sidebar:
                     st.info(f"💡 Tip: Some tickers need exchange suffixes. Try: {t_input}.CO (Copenhagen), {t_input}.TO (Toronto), {t_input}.L (London), etc.")
                     # Try to show what went wrong
                     try:
-                        test_ticker = yf.Ticker(t_input)
-                        test_info = test_ticker.info
+                        test_info = call_with_timeout(getattr, CachedTicker(t_input), "info", timeout=SEARCH_TIMEOUT)
                         if test_info:
                             st.warning(f"⚠️ Ticker {t_input} exists but missing required data fields.")
                         else:
@@ -1578,6 +1365,8 @@ with st.sidebar.form("input_form"):
     # Currency se usa desde target_currency de arriba
 
     st.header("Financial Information")
+    if st.session_state.get('fetch_sources'):
+        st.caption("Auto-filled from: " + ", ".join(f"{field} ({source})" for field, source in st.session_state.fetch_sources.items()))
     
     # Check which values are missing (0) and show warning
     missing_fields = []
@@ -1660,6 +1449,35 @@ with st.sidebar.form("input_form"):
         std_reinv_5y = st.number_input("Std Reinv 5y (%)", min_value=0.0, max_value=20.0, value=2.5, step=0.1)
         std_reinv_5_10y = st.number_input("Std Reinv 5-10y (%)", min_value=0.0, max_value=20.0, value=5.0, step=0.1)
 
+    with st.expander("Input Distributions (advanced)"):
+        st.caption("Means and standard deviations above are kept; bounded choices stop reinvestment from leaving 0-100% and rates from going negative.")
+        distribution_choices = [name for name in SAMPLERS if name != 'empirical']
+        distributions = {}
+        col1, col2 = st.columns(2)
+        for i, (sim_name, label) in enumerate(DISTRIBUTION_LABELS.items()):
+            with (col1 if i % 2 == 0 else col2):
+                kind = st.selectbox(label, distribution_choices, index=0, key=f"dist_{sim_name}")
+            if kind == 'truncated_normal':
+                low, high = DISTRIBUTION_BOUNDS[sim_name]
+                distributions[sim_name] = {'type': kind, 'low': low, 'high': high}
+            elif kind != 'normal':
+                distributions[sim_name] = {'type': kind}
+
+        mean_reverting_growth = st.checkbox("Mean-reverting annual growth (AR(1) around the stage means)", value=False)
+        growth_persistence = st.number_input("Growth persistence (AR(1) φ)", min_value=0.0, max_value=0.95, value=0.6, step=0.05)
+        bootstrap_growth = st.checkbox("Bootstrap growth 5y / 5-10y from the ticker's historical statements", value=False)
+        bootstrap_source = st.selectbox("Bootstrap growth series", ["revenue", "operating_income"], index=0)
+        importance_sampling = st.checkbox("Importance sampling for VaR / CVaR (oversample the low-value tail and reweight)", value=False)
+
+        st.caption("Rank correlations between inputs (Gaussian copula); 0 keeps them independent.")
+        rank_correlation = {}
+        col1, col2 = st.columns(2)
+        for i, ((a, b), label) in enumerate(CORRELATION_PAIRS.items()):
+            with (col1 if i % 2 == 0 else col2):
+                rho = st.number_input(label, min_value=-0.95, max_value=0.95, value=0.0, step=0.05, key=f"corr_{a}_{b}")
+            if rho != 0:
+                rank_correlation[(a, b)] = rho
+
     n_simulations = st.number_input("Simulations", min_value=1000, max_value=100000, value=10000, step=1000)
     submitted = st.form_submit_button("Run Simulation")
 
@@ -1685,17 +1503,34 @@ if submitted and not viewing_analysis:
         'std_growth_5y': std_growth_5y/100, 'std_growth_5_10y': std_growth_5_10y/100,
         'std_risk_free': std_risk_free/100, 'std_equity_premium': std_equity_premium/100,
         'std_WACC': std_WACC/100, 'std_reinv_5y': std_reinv_5y/100,
-        'std_reinv_5_10y': std_reinv_5_10y/100, 'n_simulations': int(n_simulations)
+        'std_reinv_5_10y': std_reinv_5_10y/100, 'n_simulations': int(n_simulations),
+        'distributions': distributions,
+        'rank_correlation': rank_correlation or None,
+        'growth_process': 'ar1' if mean_reverting_growth else 'stage',
+        'growth_persistence': growth_persistence,
+        'importance_sampling': importance_sampling
     }
+    if bootstrap_growth:
+        try:
+            with st.spinner(f"Bootstrapping historical growth for {t_input}..."):
+                params = bootstrap_growth_params(params, t_input, source=bootstrap_source)
+        except Exception as e:
+            st.error(f"❌ Could not bootstrap growth for {t_input}: {e}")
+            st.stop()
 
     with st.spinner("Running Monte Carlo simulation..."):
-        fig_es, fig_distribution_only, fig_sensitivity, valuation_summary = run_monte_carlo_simulation(params)
+        try:
+            (fig_es, fig_distribution_only, fig_sensitivity, valuation_summary), whatif_base = run_simulation_with_draws(params)
+        except ValueError as e:
+            st.error(f"❌ Invalid input distribution or correlation: {e}")
+            st.stop()
         
         # Save the analysis
         analysis_id = save_analysis(t_input, company_name, valuation_summary, fig_es, fig_distribution_only, fig_sensitivity)
+        store_whatif_base(params, whatif_base)
         st.success(f"Monte Carlo simulation for {company_name} completed successfully! Analysis saved.")
 
-        tab1, tab2, tab3 = st.tabs(["Results", "Summary", "Performed Analyses"])
+        tab1, tab2, tab_whatif, tab3 = st.tabs(["Results", "Summary", "What-if", "Performed Analyses"])
         
         with tab1:
             # Removed Results header
@@ -1728,6 +1563,17 @@ if submitted and not viewing_analysis:
                     mime="image/png"
                 )
 
+                # Smoothed density (FFT KDE) of the intrinsic value, as data
+                density = valuation_summary['Density']
+                density_csv = "value,density\n" + "".join(
+                    f"{x},{y}\n" for x, y in zip(density['value'], density['density']))
+                st.download_button(
+                    label="Download Value Density (CSV)",
+                    data=density_csv,
+                    file_name=f"{company_name}_intrinsic_value_density.csv",
+                    mime="text/csv"
+                )
+
             with col2_summary:
                 st.markdown("""
                     <style>
@@ -1751,6 +1597,7 @@ if submitted and not viewing_analysis:
                 # Create two columns for the summary content
                 sum_col1, sum_col2 = st.columns(2)
                 
+                ess_line = f"<br>Eff. Sample Size: {valuation_summary['Effective Sample Size']}" if 'Effective Sample Size' in valuation_summary else ''
                 with sum_col1:
                     st.markdown(f"""
                         <div class="summary-text">
@@ -1766,7 +1613,7 @@ if submitted and not viewing_analysis:
                         <p><strong>Risk Metrics:</strong><br>
                         VaR 95%: {valuation_summary['VaR 95%']}<br>
                         CVaR 95%: {valuation_summary['CVaR 95%']}<br>
-                        Std. Deviation: {valuation_summary['Std. Deviation']}</p>
+                        Std. Deviation: {valuation_summary['Std. Deviation']}{ess_line}</p>
                         </div>
                     """, unsafe_allow_html=True)
                 
@@ -1789,11 +1636,13 @@ if submitted and not viewing_analysis:
                         </div>
                     """, unsafe_allow_html=True)
 
-        # Close the plot figures to free up memory
-        plt.close(fig_es)
-        plt.close(fig_distribution_only)
-        plt.close(fig_sensitivity)
+        # Figures are plain Agg-backed matplotlib.figure.Figure objects (not registered
+        # with pyplot), so they are garbage-collected with this script run.
         
+        # What-if tab (slider changes rerun the script and continue under New Analysis)
+        with tab_whatif:
+            display_whatif()
+
         # Performed Analyses tab
         with tab3:
             display_saved_analyses()
@@ -1864,6 +1713,7 @@ else:
     
     if tab_selection == "New Analysis":
         st.info("Fill out the form in the sidebar and click 'Run Simulation' to perform a new analysis.")
+        display_whatif()
     else:
         display_saved_analyses()
 
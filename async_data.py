@@ -0,0 +1,110 @@
+"""
+asyncio facade over the blocking market data calls.
+
+Blocking yfinance and cache calls run on one bounded thread pool, shared by the
+app and the batch report. Each call is awaited
+with a hard timeout, and gather-style helpers fan calls out concurrently. Timed-out
+or cancelled calls give the caller control back at once. A worker thread that is
+already inside a hung request cannot be interrupted. It finishes in the background,
+and the pool size bounds how many can pile up. Calls that have not started are
+cancelled outright.
+
+Synchronous code (the Streamlit script, StockAnalyzer) uses run_sync or
+call_with_timeout. These also work when an event loop is already running, as in
+Jupyter.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from market_data import CachedTicker
+
+DATA_WORKERS = 16
+REQUEST_TIMEOUT = 20.0
+
+_executor = ThreadPoolExecutor(max_workers=DATA_WORKERS, thread_name_prefix="market-data")
+
+
+async def run_blocking(func, *args, timeout=REQUEST_TIMEOUT, **kwargs):
+    """Run func(*args, **kwargs) on the data pool; raises asyncio.TimeoutError after `timeout` seconds"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs)), timeout)
+
+
+async def fetch_attribute(ticker, attribute, timeout=REQUEST_TIMEOUT):
+    """A CachedTicker attribute (info, fast_info, a statement, ...) fetched with a timeout"""
+    return await run_blocking(getattr, CachedTicker(ticker), attribute, timeout=timeout)
+
+
+async def gather_calls(calls, timeout=REQUEST_TIMEOUT):
+    """Run (func, *args) calls concurrently; results in order, with exceptions (including timeouts) in place of failures"""
+    return await asyncio.gather(*(run_blocking(*call, timeout=timeout) for call in calls), return_exceptions=True)
+
+
+async def first_valid(calls, timeout=REQUEST_TIMEOUT, limit=None):
+    """
+    Start the (func, *args) calls, at most `limit` at a time and in list order,
+    then take results in list order and return (index, result, empty) for the
+    first that is not None, cancelling the rest. Calls still queued behind the
+    limit never reach the pool. `empty` lists the indices before it whose call
+    actually returned None; calls that raised or timed out are skipped but not
+    listed, since they say nothing definitive. Returns (None, None, empty) if
+    none succeed.
+    """
+    slots = asyncio.Semaphore(limit or len(calls) or 1)
+
+    async def limited(call):
+        async with slots:
+            return await run_blocking(*call, timeout=timeout)
+
+    tasks = [asyncio.ensure_future(limited(call)) for call in calls]
+    empty = []
+    try:
+        for index, task in enumerate(tasks):
+            try:
+                result = await task
+            except Exception:
+                continue
+            if result is not None:
+                return index, result, empty
+            empty.append(index)
+        return None, None, empty
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def prefetch(tickers, attributes, timeout=REQUEST_TIMEOUT):
+    """Load attributes for every ticker concurrently into the cache; returns {(ticker, attribute): exception} for failures"""
+    pairs = [(ticker, attribute) for ticker in tickers for attribute in attributes]
+    results = await asyncio.gather(*(fetch_attribute(ticker, attribute, timeout) for ticker, attribute in pairs),
+                                   return_exceptions=True)
+    return {pair: result for pair, result in zip(pairs, results) if isinstance(result, BaseException)}
+
+
+def run_sync(coro):
+    """Run a coroutine from synchronous code, on a helper thread if this thread already runs an event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = asyncio.run(coro)
+        except BaseException as error:
+            outcome['error'] = error
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def call_with_timeout(func, *args, timeout=REQUEST_TIMEOUT, **kwargs):
+    """Blocking call with a hard timeout, for synchronous callers; raises asyncio.TimeoutError"""
+    return run_sync(run_blocking(func, *args, timeout=timeout, **kwargs))
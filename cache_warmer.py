@@ -0,0 +1,121 @@
+"""
+Background warm-up of the market data cache.
+
+Each pass re-fetches the datasets that fetch_data's tiers read for the most
+recently resolved tickers first (fast_info, profile, balance sheet and income
+statements), then the long-lived ones (profile and statements) for the rest of
+the ticker database; short-lived fast_info is not worth keeping warm for
+hundreds of tickers nobody asked for. It only touches entries that are missing
+or within WARM_AHEAD of their TTL from expiry, so interactive auto-fill nearly
+always hits a warm cache. Requests go through the shared rate limiter, and
+before each dataset request the warmer waits until the bucket has spare
+tokens, so interactive users keep priority. Tickers Yahoo definitively has no data for
+(delisted or unknown) are recorded as failed listings, and listings that failed
+recently are skipped.
+
+Run it as a daemon thread inside the Streamlit server (start_background_warmer;
+the app starts one unless DCF_CACHE_WARMER=0) or as a standalone process
+sharing the same cache database:
+
+    python cache_warmer.py [--interval 300] [--once] [TICKER ...]
+"""
+import argparse
+import logging
+import os
+import threading
+
+from market_data import RATE_BURST, CachedTicker, get_cache, get_limiter, is_missing_symbol_error
+from ticker_database import TICKER_DATABASE
+
+# Set DCF_CACHE_WARMER=0 to keep the Streamlit app from starting its background warmer
+WARMER_ENABLED = os.environ.get('DCF_CACHE_WARMER', '1') != '0'
+WARM_INTERVAL = 5 * 60
+RECENT_TICKERS = 50
+# Datasets warmed for the ticker database beyond the recent listings
+LONG_LIVED_DATASETS = ('profile', 'statements')
+# Tokens left free for interactive requests while the warmer runs
+WARM_HEADROOM = RATE_BURST // 2
+
+
+def warm_list(tickers, cache=None):
+    """
+    (recent, rest): recently resolved listings, then the other tickers, without
+    duplicates or recently failed listings
+    """
+    cache = cache or get_cache()
+    recent = list(dict.fromkeys(cache.recent_listings(RECENT_TICKERS)))
+    rest = [ticker for ticker in dict.fromkeys(t.upper() for t in tickers) if ticker not in recent]
+    failed = cache.failed_listings(recent + rest)
+    return [ticker for ticker in recent if ticker not in failed], [ticker for ticker in rest if ticker not in failed]
+
+
+def _is_missing(cache, ticker):
+    """True when what the warm-up cached shows Yahoo has no such listing (no fast_info, or info without a quoteType)"""
+    fast_info = cache.get(ticker, 'fast_info')
+    if fast_info is not None and (not fast_info or fast_info.get('quoteType') == 'NONE'):
+        return True
+    profile = cache.get(ticker, 'profile')
+    return profile is not None and not profile.get('quoteType')
+
+
+def warm_tickers(tickers, cache=None, stop=None, datasets=('fast_info', 'profile', 'statements')):
+    """
+    One warm-up pass over tickers for `datasets`; returns the number of datasets
+    fetched. Definitive misses (a "no such symbol" error, or nothing to cache)
+    are recorded as failed listings so the next passes skip them.
+    """
+    cache = cache or get_cache()
+    refreshed = 0
+    for ticker in tickers:
+        if stop is not None and stop.is_set():
+            break
+        try:
+            refreshed += CachedTicker(ticker, cache).refresh_expiring(
+                datasets=datasets, before_fetch=lambda: get_limiter().wait_for_headroom(WARM_HEADROOM))
+        except Exception as e:
+            if is_missing_symbol_error(e):
+                cache.record_failures([ticker])
+            else:
+                logging.warning(f"Cache warm-up failed for {ticker}: {str(e)}")
+            continue
+        if _is_missing(cache, ticker):
+            cache.record_failures([ticker])
+    return refreshed
+
+
+def run_warmer(tickers=tuple(TICKER_DATABASE), interval=WARM_INTERVAL, stop=None, once=False):
+    """Warm the cache every `interval` seconds until stop is set (or once)"""
+    cache = get_cache()
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        recent, rest = warm_list(tickers, cache)
+        refreshed = warm_tickers(recent, cache, stop)
+        refreshed += warm_tickers(rest, cache, stop, LONG_LIVED_DATASETS)
+        cache.clear_expired()
+        logging.info(f"Cache warm-up pass refreshed {refreshed} datasets")
+        if once:
+            break
+        stop.wait(interval)
+
+
+def start_background_warmer(tickers=tuple(TICKER_DATABASE), interval=WARM_INTERVAL):
+    """Start run_warmer on a daemon thread; returns (thread, stop event)"""
+    stop = threading.Event()
+    thread = threading.Thread(target=run_warmer, args=(tickers, interval, stop), name="cache-warmer", daemon=True)
+    thread.start()
+    return thread, stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the market data cache warm for popular and recently used tickers")
+    parser.add_argument("tickers", nargs='*', help="Tickers to warm (default: the ticker database)")
+    parser.add_argument("--interval", type=int, default=WARM_INTERVAL, help="Seconds between passes")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    run_warmer(args.tickers or tuple(TICKER_DATABASE), args.interval, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
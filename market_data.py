@@ -0,0 +1,533 @@
+"""
+Shared, persistent cache for Yahoo Finance data.
+
+Info dicts, price histories and financial statements are stored per ticker in
+a SQLite database with a time-to-live per dataset. The database runs in WAL
+mode with a busy timeout, so the Streamlit app, the report generator and worker
+processes can share it safely. Within the TTL, repeat reads come straight from
+disk with no network call. Empty results (an ETF's missing statements, a
+listing without fast_info) are cached too, for at most NEGATIVE_TTL, so they
+are not re-requested on every read either. CachedTicker wraps yf.Ticker with the same
+attribute names. Datasets that are not cached pass through to yfinance
+unchanged.
+
+Every request that reaches yfinance goes through one process-wide token bucket
+(RateLimiter). It is shared by all threads and Streamlit sessions. On HTTP 429
+it halves its rate and pauses all callers with exponential backoff, then
+climbs back toward RATE_LIMIT as requests succeed.
+
+bulk_download fetches daily prices for many tickers in one threaded
+yf.download call (through the limiter) and splits the result per ticker;
+price_store builds its incremental history store on it.
+
+FxRates keeps an in-memory matrix of USD rates, refreshed per FX_TTL, and
+derives any cross rate (including minor units such as GBp) by triangulation
+through USD, so a batch needs one request per currency rather than one per
+ticker.
+
+The same database remembers which listing (exchange suffix variant) a
+user-entered ticker resolved to, and which listings failed recently, so lookups
+go straight to the known listing and known-bad symbols fail fast.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import yfinance as yf
+
+CACHE_PATH = Path(os.environ.get('DCF_CACHE_PATH', Path(__file__).parent.absolute() / "cache" / "market_data.sqlite"))
+
+# Seconds each dataset stays fresh
+DATASET_TTL = {
+    'info': 6 * 3600,
+    'fast_info': 15 * 60,
+    'history': 15 * 60,
+    'statements': 24 * 3600,
+    'profile': 30 * 24 * 3600,
+}
+# Statements read by fetch_data's statement tier, kept warm by the cache warmer
+WARM_STATEMENTS = ('quarterly_balance_sheet', 'balance_sheet', 'quarterly_income_stmt', 'income_stmt')
+# Fraction of a dataset's TTL before expiry at which the warmer re-fetches it
+WARM_AHEAD = 0.25
+# Slow-changing info fields kept in the long-lived 'profile' dataset
+PROFILE_FIELDS = ('currency', 'financialCurrency', 'quoteType', 'exchange', 'shortName', 'longName')
+# FastInfo properties fetch_data reads; the others each cost a request and are never used
+FAST_INFO_FIELDS = ('currency', 'quoteType', 'lastPrice', 'previousClose', 'shares', 'marketCap')
+
+# Seconds a learned ticker -> listing resolution, and a failed listing or empty result, are trusted
+RESOLUTION_TTL = 30 * 24 * 3600
+NEGATIVE_TTL = 3600
+
+# Process-wide Yahoo request budget: sustained requests per second and burst size
+RATE_LIMIT = float(os.environ.get('DCF_YF_RATE', 4.0))
+RATE_BURST = 8
+# Retries of a throttled (HTTP 429) request, and the longest pause between them in seconds
+RATE_LIMIT_RETRIES = 4
+MAX_BACKOFF = 60.0
+
+FX_TTL = 15 * 60
+# Currencies quoted against USD (USD{ccy}=X); any cross rate is triangulated through USD
+FX_CURRENCIES = (
+    'EUR', 'GBP', 'JPY', 'CHF', 'CAD', 'AUD', 'DKK', 'SEK', 'NOK', 'CNY',
+    'HKD', 'TWD', 'KRW', 'INR', 'SGD', 'BRL', 'MXN', 'ZAR', 'PLN', 'ILS',
+)
+# Minor-unit quotes (pence, cents, agorot) -> (major currency, minor units per major unit)
+MINOR_UNITS = {'GBp': ('GBP', 100), 'GBX': ('GBP', 100), 'ZAc': ('ZAR', 100), 'ZAC': ('ZAR', 100), 'ILA': ('ILS', 100)}
+
+# yf.Ticker statement attributes served from the 'statements' dataset
+STATEMENT_ATTRIBUTES = (
+    'income_stmt', 'quarterly_financials', 'quarterly_income_stmt', 'financials',
+    'balance_sheet', 'quarterly_balance_sheet', 'cashflow', 'quarterly_cashflow',
+)
+
+
+def _is_empty(payload):
+    if payload is None:
+        return True
+    if isinstance(payload, (pd.DataFrame, pd.Series)):
+        return payload.empty
+    if isinstance(payload, dict):
+        return len(payload) == 0
+    return False
+
+
+def is_missing_symbol_error(error):
+    """True when yfinance definitively reports that a symbol has no data (unknown or delisted), as opposed to a transient failure"""
+    if type(error).__name__ in ('YFTzMissingError', 'YFPricesMissingError', 'YFSymbolNotFoundError'):
+        return True
+    message = str(error).lower()
+    if _is_rate_limited(error):
+        return False
+    return any(marker in message for marker in ('quote not found', 'no data found', 'possibly delisted', '404'))
+
+
+def _is_rate_limited(error):
+    """True for yfinance's rate-limit error or an HTTP 429 surfaced by the underlying session"""
+    message = str(error)
+    return type(error).__name__ == 'YFRateLimitError' or '429' in message or 'Too Many Requests' in message
+
+
+class RateLimiter:
+    """
+    Token bucket with AIMD rate control: callers take one token per request
+    (waiting if the bucket is empty). A 429 halves the rate and blocks every
+    caller for a backoff that doubles with each consecutive 429. Each success
+    adds back a small step of the rate, up to max_rate.
+    """
+
+    def __init__(self, max_rate=RATE_LIMIT, burst=RATE_BURST, min_rate=0.25):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff = 1.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def wait_for_headroom(self, headroom):
+        """Block until more than `headroom` tokens are free, without taking one (background work yields to users)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= headroom + 1:
+                    return
+                wait = max(self.blocked_until - now, (headroom + 1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.blocked_until = time.monotonic() + self.backoff
+            self.backoff = min(MAX_BACKOFF, self.backoff * 2)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+            self.backoff = 1.0
+
+    def call(self, fetch, retries=RATE_LIMIT_RETRIES):
+        """Run fetch() under the budget, retrying with backoff while Yahoo answers 429"""
+        for attempt in range(retries + 1):
+            self.acquire()
+            try:
+                result = fetch()
+            except Exception as error:
+                if not _is_rate_limited(error) or attempt == retries:
+                    raise
+                self.throttled()
+                continue
+            self.succeeded()
+            return result
+
+
+_default_limiter = RateLimiter()
+
+
+def get_limiter():
+    """Process-wide limiter every yfinance request goes through"""
+    return _default_limiter
+
+
+class MarketDataCache:
+    """SQLite-backed (ticker, dataset, key) -> pickled payload store with per-dataset TTLs"""
+
+    def __init__(self, path=CACHE_PATH, ttl=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = {**DATASET_TTL, **(ttl or {})}
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " ticker TEXT NOT NULL, dataset TEXT NOT NULL, key TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL, payload BLOB NOT NULL,"
+                " PRIMARY KEY (ticker, dataset, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resolutions ("
+                " ticker TEXT PRIMARY KEY, listing TEXT NOT NULL, currency TEXT, resolved_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS failed_listings (listing TEXT PRIMARY KEY, failed_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        """One connection per thread (sqlite3 connections must not be shared across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _lifetime(self, dataset, payload):
+        """Seconds an entry stays fresh: the dataset TTL, capped at NEGATIVE_TTL for empty payloads"""
+        ttl = self.ttl.get(dataset, 0)
+        return min(ttl, NEGATIVE_TTL) if _is_empty(payload) else ttl
+
+    def get(self, ticker, dataset, key=''):
+        """Cached payload (possibly empty) if present and still fresh, else None"""
+        row = self._connection().execute(
+            "SELECT fetched_at, payload FROM entries WHERE ticker = ? AND dataset = ? AND key = ?",
+            (ticker, dataset, key),
+        ).fetchone()
+        if row is None:
+            return None
+        payload = pickle.loads(row[1])
+        return payload if time.time() - row[0] <= self._lifetime(dataset, payload) else None
+
+    def put(self, ticker, dataset, payload, key=''):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (ticker, dataset, key, fetched_at, payload) VALUES (?, ?, ?, ?, ?)",
+                (ticker, dataset, key, time.time(), pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)),
+            )
+
+    def get_or_fetch(self, ticker, dataset, fetch, key='', rate_limited=True):
+        """Return the cached payload, or call fetch() and store its result (empty results for at most NEGATIVE_TTL)"""
+        payload = self.get(ticker, dataset, key)
+        if payload is not None:
+            return payload
+        return self.refresh(ticker, dataset, fetch, key, rate_limited)
+
+    def refresh(self, ticker, dataset, fetch, key='', rate_limited=True):
+        """
+        Call fetch() under the rate limiter and store its result regardless of the
+        cached entry's age. rate_limited=False is for fetches that take limiter
+        tokens themselves, one per request.
+        """
+        payload = get_limiter().call(fetch) if rate_limited else fetch()
+        if payload is not None:
+            self.put(ticker, dataset, payload, key)
+        return payload
+
+    def expiring(self, ticker, dataset, key='', ahead=0.0):
+        """True if the entry is missing or within `ahead` (a fraction of its lifetime) of going stale"""
+        row = self._connection().execute(
+            "SELECT fetched_at, payload FROM entries WHERE ticker = ? AND dataset = ? AND key = ?",
+            (ticker, dataset, key),
+        ).fetchone()
+        if row is None:
+            return True
+        lifetime = self._lifetime(dataset, pickle.loads(row[1]))
+        return row[0] + lifetime - time.time() < ahead * lifetime
+
+    def resolved_listing(self, ticker):
+        """(listing, currency) that last worked for a user-entered ticker, or None if unknown or stale"""
+        row = self._connection().execute(
+            "SELECT listing, currency FROM resolutions WHERE ticker = ? AND resolved_at >= ?",
+            (ticker, time.time() - RESOLUTION_TTL),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def record_resolution(self, ticker, listing, currency=None):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO resolutions (ticker, listing, currency, resolved_at) VALUES (?, ?, ?, ?)",
+                (ticker, listing, currency, time.time()),
+            )
+            conn.execute("DELETE FROM failed_listings WHERE listing = ?", (listing,))
+
+    def recent_listings(self, limit=50):
+        """Listings of the most recently resolved tickers, newest first"""
+        rows = self._connection().execute(
+            "SELECT listing FROM resolutions ORDER BY resolved_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def forget_resolution(self, ticker):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM resolutions WHERE ticker = ?", (ticker,))
+
+    def failed_listings(self, listings):
+        """Subset of listings that failed within NEGATIVE_TTL"""
+        listings = list(listings)
+        if not listings:
+            return set()
+        rows = self._connection().execute(
+            f"SELECT listing FROM failed_listings WHERE failed_at >= ? AND listing IN ({', '.join('?' * len(listings))})",
+            (time.time() - NEGATIVE_TTL, *listings),
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def record_failures(self, listings):
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO failed_listings (listing, failed_at) VALUES (?, ?)",
+                [(listing, now) for listing in listings],
+            )
+
+    def clear_expired(self):
+        """Delete entries older than their dataset TTL, and stale resolutions and failures"""
+        now = time.time()
+        with self._connection() as conn:
+            for dataset, ttl in self.ttl.items():
+                conn.execute("DELETE FROM entries WHERE dataset = ? AND fetched_at < ?", (dataset, now - ttl))
+            conn.execute("DELETE FROM resolutions WHERE resolved_at < ?", (now - RESOLUTION_TTL,))
+            conn.execute("DELETE FROM failed_listings WHERE failed_at < ?", (now - NEGATIVE_TTL,))
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide default cache at CACHE_PATH"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MarketDataCache()
+        return _default_cache
+
+
+def _fast_info_dict(fast_info):
+    """
+    Plain dict of FAST_INFO_FIELDS. FastInfo resolves each property lazily, often
+    with its own request, so only these are read, each under its own limiter
+    token. Fields that raise for thinly covered listings are left out.
+    """
+    values = {}
+    for field in FAST_INFO_FIELDS:
+        try:
+            values[field] = get_limiter().call(lambda field=field: fast_info[field])
+        except Exception as error:
+            if _is_rate_limited(error):
+                raise
+            continue
+    return values
+
+
+def _history_key(kwargs):
+    """Cache key for history() arguments; datetimes count by calendar day so datetime.now() bounds still hit"""
+    normalized = {name: value.date().isoformat() if hasattr(value, 'date') and callable(value.date) else value
+                  for name, value in kwargs.items()}
+    return repr(sorted(normalized.items()))
+
+
+class CachedTicker:
+    """Drop-in wrapper around yf.Ticker that serves info, fast_info, history and statements from the cache"""
+
+    def __init__(self, ticker, cache=None):
+        self.ticker = ticker.upper()
+        self.cache = cache or get_cache()
+        self._yf_ticker = None
+
+    @property
+    def yf_ticker(self):
+        # yf.Ticker is created lazily so cache hits never touch yfinance
+        if self._yf_ticker is None:
+            self._yf_ticker = yf.Ticker(self.ticker)
+        return self._yf_ticker
+
+    @property
+    def info(self):
+        return self.cache.get_or_fetch(self.ticker, 'info', lambda: self.yf_ticker.info)
+
+    @property
+    def fast_info(self):
+        return self.cache.get_or_fetch(self.ticker, 'fast_info', lambda: _fast_info_dict(self.yf_ticker.fast_info),
+                                       rate_limited=False)
+
+    def last_price(self):
+        """
+        fast_info lastPrice from the cached fast_info, or else from a single
+        limited request (not cached). A cheap probe of whether a listing trades,
+        without the other FastInfo fields.
+        """
+        cached = self.cache.get(self.ticker, 'fast_info')
+        if cached is not None:
+            return cached.get('lastPrice')
+        return get_limiter().call(lambda: self.yf_ticker.fast_info['lastPrice'])
+
+    @property
+    def profile(self):
+        """PROFILE_FIELDS from info, kept for a month so currency lookups rarely need the full payload"""
+        # self.info takes its own limiter token if it has to fetch, so this one must not
+        return self.cache.get_or_fetch(self.ticker, 'profile', lambda: {field: self.info.get(field) for field in PROFILE_FIELDS},
+                                       rate_limited=False)
+
+    def refresh_expiring(self, ahead=WARM_AHEAD, datasets=('fast_info', 'profile', 'statements'), before_fetch=None):
+        """
+        Re-fetch the datasets auto-fill reads (fast_info, profile, WARM_STATEMENTS),
+        limited to `datasets`, that are missing or within `ahead` of their TTL from
+        expiry. before_fetch() runs before each fetch (the warmer waits for limiter
+        headroom there). Returns how many were fetched.
+        """
+        fetches = [
+            ('fast_info', '', lambda: _fast_info_dict(self.yf_ticker.fast_info), False),
+            ('profile', '', lambda: {field: self.info.get(field) for field in PROFILE_FIELDS}, False),
+        ]
+        fetches += [('statements', name, lambda name=name: getattr(self.yf_ticker, name), True)
+                    for name in WARM_STATEMENTS]
+        refreshed = 0
+        for dataset, key, fetch, rate_limited in fetches:
+            if dataset in datasets and self.cache.expiring(self.ticker, dataset, key, ahead):
+                if before_fetch is not None:
+                    before_fetch()
+                self.cache.refresh(self.ticker, dataset, fetch, key, rate_limited)
+                refreshed += 1
+        return refreshed
+
+    def history(self, **kwargs):
+        key = _history_key(kwargs)
+        return self.cache.get_or_fetch(self.ticker, 'history', lambda: self.yf_ticker.history(**kwargs), key)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in STATEMENT_ATTRIBUTES:
+            return self.cache.get_or_fetch(self.ticker, 'statements', lambda: getattr(self.yf_ticker, name), name)
+        return get_limiter().call(lambda: getattr(self.yf_ticker, name))
+
+
+def _download_frame(data, ticker):
+    """One ticker's rows from a yf.download result (MultiIndex columns when grouped by ticker)"""
+    if data is None or data.empty:
+        return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        if ticker not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        data = data[ticker]
+    return data[data['Close'].notna()] if 'Close' in data.columns else data.dropna(how='all')
+
+
+def bulk_download(tickers, **kwargs):
+    """One threaded yf.download call (through the rate limiter), split into {ticker: DataFrame}"""
+    tickers = list(tickers)
+    data = get_limiter().call(lambda: yf.download(tickers, group_by='ticker', threads=True, progress=False, **kwargs))
+    return {ticker: _download_frame(data, ticker) for ticker in tickers}
+
+
+def _major_currency(currency):
+    """(major currency, minor units per major unit) for a quote currency code"""
+    if currency in MINOR_UNITS:
+        return MINOR_UNITS[currency]
+    return currency.upper(), 1
+
+
+class FxRates:
+    """Units of each currency per USD, fetched once per TTL; rate() triangulates any pair through USD"""
+
+    def __init__(self, ttl=FX_TTL, cache=None):
+        self.ttl = ttl
+        self.cache = cache
+        self._per_usd = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, currency):
+        history = CachedTicker(f"USD{currency}=X", self.cache).history(period="5d")
+        if history is None or history.empty:
+            return None
+        rate = float(history['Close'].dropna().iloc[-1])
+        return rate if rate > 0 else None
+
+    def per_usd(self, currency):
+        """Units of currency per USD, or None if unavailable (a stale rate is kept over none)"""
+        if currency == 'USD':
+            return 1.0
+        with self._lock:
+            entry = self._per_usd.get(currency)
+        if entry and time.time() - entry[1] <= self.ttl:
+            return entry[0]
+        try:
+            rate = self._fetch(currency)
+        except Exception:
+            rate = None
+        if rate is None and entry:
+            return entry[0]
+        # A missing rate is remembered for the TTL too, so unknown currencies are not re-requested per call
+        with self._lock:
+            self._per_usd[currency] = (rate, time.time())
+        return rate
+
+    def refresh(self, currencies=FX_CURRENCIES):
+        """Load the USD pairs for currencies concurrently (e.g. before a batch of fetches)"""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(self.per_usd, currencies))
+
+    def rate(self, base, quote):
+        """Units of quote per unit of base, e.g. rate('GBp', 'EUR'); None if a leg is unavailable"""
+        base, base_units = _major_currency(base)
+        quote, quote_units = _major_currency(quote)
+        if base == quote:
+            return quote_units / base_units
+        base_per_usd, quote_per_usd = self.per_usd(base), self.per_usd(quote)
+        if not base_per_usd or not quote_per_usd:
+            return None
+        return quote_per_usd / base_per_usd * quote_units / base_units
+
+
+_default_fx = None
+
+
+def get_fx():
+    """Process-wide FX matrix shared by fetch_data and StockAnalyzer"""
+    global _default_fx
+    with _default_cache_lock:
+        if _default_fx is None:
+            _default_fx = FxRates()
+        return _default_fx
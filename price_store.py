@@ -0,0 +1,131 @@
+"""
+Incremental on-disk store of daily price histories.
+
+Each ticker's full history is kept as one Parquet file of raw Yahoo rows
+(split-adjusted OHLC, volume, dividends and splits; no dividend adjustment).
+Only closed sessions are kept: a row dated today may still be intraday, so it
+is dropped before storing, and a ticker is current once it holds the previous
+business day. A later load downloads only the rows from the last stored date
+onwards, with one bulk request per distinct last stored date. It then rewrites
+the file atomically (temp file + os.replace). If a new split appears, or the
+overlapping close no longer matches, the stored split-adjusted history is out
+of date, so the ticker is downloaded again in full. Dividend adjustment is
+applied locally on read, like Yahoo's auto_adjust, so stored rows never change
+when a dividend goes ex.
+"""
+import os
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+from market_data import bulk_download
+
+PRICE_STORE_DIR = Path(os.environ.get('DCF_PRICE_STORE', Path(__file__).parent.absolute() / "cache" / "prices"))
+RAW_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+# Relative close mismatch on the overlapping day that forces a full download
+OVERLAP_TOLERANCE = 1e-3
+
+
+def _store_path(ticker, store_dir=None):
+    return Path(store_dir or PRICE_STORE_DIR) / f"{ticker.replace('/', '_')}.parquet"
+
+
+def _read(ticker, store_dir=None):
+    path = _store_path(ticker, store_dir)
+    return pd.read_parquet(path) if path.exists() else None
+
+
+def _write(ticker, frame, store_dir=None):
+    """Atomically replace the ticker's file, so concurrent readers never see a partial write"""
+    path = _store_path(ticker, store_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    frame.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _raw(frame, today):
+    """Stored layout: RAW_COLUMNS on a tz-naive daily index, closed sessions only (rows before today)"""
+    frame = frame.reindex(columns=RAW_COLUMNS)
+    frame[['Dividends', 'Stock Splits']] = frame[['Dividends', 'Stock Splits']].fillna(0.0)
+    index = pd.to_datetime(frame.index)
+    frame.index = (index.tz_localize(None) if index.tz is not None else index).normalize()
+    frame.index.name = 'Date'
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+    return frame[frame.index < today]
+
+
+def _needs_full_download(stored, tail):
+    """
+    True when the tail brings a split or disagrees with the stored close on the
+    overlapping day. Both frames hold closed sessions only, so a mismatch means
+    Yahoo revised the history rather than that the stored close was intraday.
+    """
+    last = stored.index.max()
+    if (tail.loc[tail.index > last, 'Stock Splits'] > 0).any():
+        return True
+    if last in tail.index:
+        return abs(tail.at[last, 'Close'] / stored.at[last, 'Close'] - 1) > OVERLAP_TOLERANCE
+    return False
+
+
+def adjust_dividends(raw):
+    """Dividend-adjusted prices (Yahoo auto_adjust style): rows before each ex-date scale by 1 - dividend / previous close"""
+    step = (1 - raw['Dividends'] / raw['Close'].shift(1)).where(raw['Dividends'] > 0, 1.0).fillna(1.0)
+    factor = step[::-1].cumprod()[::-1].shift(-1, fill_value=1.0)
+    adjusted = raw.copy()
+    adjusted[PRICE_COLUMNS] = raw[PRICE_COLUMNS].mul(factor, axis=0)
+    return adjusted
+
+
+def undo_splits(raw):
+    """Prices as traded on each day: Yahoo's split-adjusted OHLC scaled back by the splits that came later"""
+    ratios = raw['Stock Splits'].where(raw['Stock Splits'] > 0, 1.0)
+    factor = ratios[::-1].cumprod()[::-1].shift(-1, fill_value=1.0)
+    traded = raw.copy()
+    traded[PRICE_COLUMNS] = raw[PRICE_COLUMNS].mul(factor, axis=0)
+    return traded
+
+
+def update_histories(tickers, store_dir=None):
+    """Bring the stored histories of tickers up to date; returns {ticker: raw DataFrame} (empty when Yahoo has none)"""
+    today = pd.Timestamp(date.today())
+    last_closed = today - pd.offsets.BDay(1)
+    stored = {ticker: _read(ticker, store_dir) for ticker in dict.fromkeys(t.upper() for t in tickers)}
+    full = [ticker for ticker, frame in stored.items() if frame is None or frame.empty]
+    stale = {ticker: frame for ticker, frame in stored.items()
+             if ticker not in full and frame.index.max() < last_closed}
+
+    # One request per last stored date, so a long-stale ticker does not widen everyone's download;
+    # each download starts at that date so the overlapping close can be checked
+    by_since = {}
+    for ticker, frame in stale.items():
+        by_since.setdefault(frame.index.max(), []).append(ticker)
+    for since, group in by_since.items():
+        for ticker, tail in bulk_download(group, start=since, auto_adjust=False, actions=True).items():
+            tail = _raw(tail, today) if not tail.empty else tail
+            if tail.empty:
+                continue
+            frame = stale[ticker]
+            if _needs_full_download(frame, tail):
+                full.append(ticker)
+                continue
+            stored[ticker] = pd.concat([frame[frame.index < tail.index.min()], tail])
+            _write(ticker, stored[ticker], store_dir)
+
+    if full:
+        for ticker, frame in bulk_download(full, period='max', auto_adjust=False, actions=True).items():
+            stored[ticker] = _raw(frame, today) if not frame.empty else pd.DataFrame(columns=RAW_COLUMNS)
+            if not stored[ticker].empty:
+                _write(ticker, stored[ticker], store_dir)
+    return stored
+
+
+def load_histories(tickers, start=None, adjusted=True, store_dir=None):
+    """Up-to-date daily histories from `start`, dividend-adjusted unless adjusted=False; {ticker: DataFrame}"""
+    histories = {}
+    for ticker, raw in update_histories(tickers, store_dir).items():
+        frame = adjust_dividends(raw) if adjusted and not raw.empty else raw
+        histories[ticker] = frame[frame.index >= pd.Timestamp(start).normalize()] if start is not None else frame
+    return histories
@@ -6,7 +6,6 @@ from datetime import datetime
 import numpy as np
 import logging
 from functools import lru_cache
-import time
 from typing import Dict, List, Optional
 import os
 import smtplib
@@ -14,6 +13,9 @@ from email.message import EmailMessage
 from configparser import ConfigParser
 from email.utils import make_msgid
 from IPython.display import display, HTML
+from market_data import CachedTicker, get_fx
+from price_store import load_histories
+from async_data import call_with_timeout, prefetch, run_sync
 import matplotlib.dates as mdates
 
 # Set up logging
@@ -43,12 +45,19 @@ custom_eps_data = {
     "TEP.PA": {2024: 8.8, 2023: 10.2, 2022: 10.8, 2021: 9.7, 2020: 6.0, 2019: 7.0, 2018: 5.4, 2017: 5.4, 2016: 3.7, 2015: 3.5}
 }
 
-# Currency conversion rates (as of latest data)
+# Fallback currency conversion rates, used when the live FX matrix has no rate
 CURRENCY_RATES = {
     "TWD": 0.032,  # 1 TWD = 0.032 USD
     "CNY": 0.14,   # 1 CNY = 0.14 USD
 }
 
+def usd_rate(currency: str) -> float:
+    """USD per unit of currency from the shared FX matrix, falling back to CURRENCY_RATES"""
+    return get_fx().rate(currency, "USD") or CURRENCY_RATES[currency]
+
+# CachedTicker datasets run_analysis loads concurrently before analyzing each ticker
+REPORT_DATASETS = ('info', 'quarterly_financials', 'income_stmt', 'balance_sheet', 'cashflow', 'quarterly_cashflow')
+
 class StockAnalyzer:
     def __init__(self, tickers: List[str]):
         self.tickers = tickers
@@ -58,6 +67,7 @@ class StockAnalyzer:
         # Initialize ttm_eps_data and annual_eps_plot_data here to ensure they always exist
         self.ttm_eps_data = {'value': np.nan, 'date': None}
         self.annual_eps_plot_data = pd.Series() # Initialize as an empty Series
+        self.price_histories = {}
         
     def setup_plot_style(self):
         """Set up consistent plot styling"""
@@ -81,23 +91,16 @@ class StockAnalyzer:
         return True
 
     @lru_cache(maxsize=100)
-    def get_stock_data(self, ticker_symbol: str, max_retries: int = 3) -> Optional[yf.Ticker]:
-        """Get stock data with retry logic and caching"""
-        for attempt in range(max_retries):
-            try:
-                stock = yf.Ticker(ticker_symbol)
-                # Test if we can access the info
-                _ = stock.info
-                return stock
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    logging.warning(f"Attempt {attempt + 1} failed for {ticker_symbol}. Waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    logging.error(f"Failed to get data for {ticker_symbol} after {max_retries} attempts: {str(e)}")
-                    return None
-        return None
+    def get_stock_data(self, ticker_symbol: str) -> Optional[yf.Ticker]:
+        """Get stock data with caching; throttling and 429 backoff are handled by the shared rate limiter"""
+        try:
+            stock = CachedTicker(ticker_symbol)
+            # Test if we can access the info (with a hard timeout so a hung request cannot stall the report)
+            call_with_timeout(getattr, stock, 'info')
+            return stock
+        except Exception as e:
+            logging.error(f"Failed to get data for {ticker_symbol}: {str(e)}")
+            return None
 
     def style_dataframe(self, df: pd.DataFrame):
         """Apply consistent styling to DataFrames"""
@@ -162,9 +165,9 @@ class StockAnalyzer:
                         
                         # Convert TTM EPS to USD for specific stocks
                         if stock.ticker == "TSM":
-                            ttm_eps *= CURRENCY_RATES["TWD"]
+                            ttm_eps *= usd_rate("TWD")
                         elif stock.ticker in ["JD", "BABA"]:
-                            ttm_eps *= CURRENCY_RATES["CNY"]
+                            ttm_eps *= usd_rate("CNY")
                     else:
                         logging.warning(f"Less than 4 quarterly Diluted EPS values available for {stock.ticker}. Cannot calculate TTM EPS.")
             except Exception as e:
@@ -259,6 +262,11 @@ class StockAnalyzer:
             logging.error(f"Error preparing historical data for {stock.info.get('shortName', stock.ticker)}: {str(e)}")
             return hist
 
+    def _history_window(self):
+        """Start and end of the 10-year daily price history used for every ticker"""
+        end_date = datetime.now()
+        return end_date.replace(year=end_date.year - 10), end_date
+
     def analyze_stock(self, ticker_symbol: str):
         try:
             logging.info(f"Analyzing {ticker_symbol}")
@@ -267,9 +275,11 @@ class StockAnalyzer:
                 return
             short_name = stock.info.get('shortName', ticker_symbol)
             # Fetch historical data for a specific 10-year period aligned with user-provided EPS
-            end_date = datetime.now()
-            start_date = end_date.replace(year=end_date.year - 10)
-            hist = stock.history(start=start_date, end=end_date)
+            # (from the incremental price store loaded by run_analysis, else straight from Yahoo)
+            start_date, end_date = self._history_window()
+            hist = self.price_histories.get(ticker_symbol)
+            if hist is None or hist.empty:
+                hist = stock.history(start=start_date, end=end_date)
             # Ensure hist is timezone-naive immediately after fetching
             hist.index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
             # Ensure hist has a unique index immediately after fetching
@@ -850,6 +860,18 @@ class StockAnalyzer:
             if not self.tickers:
                 raise StockAnalyzerError("No tickers to analyze")
 
+            # Load every ticker's info and statements concurrently (with timeouts) so analyze_stock reads the cache
+            failures = run_sync(prefetch(self.tickers, REPORT_DATASETS))
+            for (ticker, attribute), error in failures.items():
+                logging.warning(f"Prefetch of {attribute} failed for {ticker}: {error!r}")
+
+            # Update the stored price histories in bulk (only rows after the last stored date are downloaded)
+            start_date, _ = self._history_window()
+            try:
+                self.price_histories = load_histories(self.tickers, start=start_date)
+            except Exception as e:
+                logging.warning(f"Price store update failed, falling back to per-ticker history: {str(e)}")
+
             for ticker in self.tickers:
                 try:
                     self.analyze_stock(ticker)
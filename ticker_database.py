@@ -0,0 +1,319 @@
+"""
+Major world stocks offered by the ticker search and kept warm by the cache warmer.
+"""
+
+TICKER_DATABASE = {
+    # US Stocks
+    'AAPL': 'Apple Inc.',
+    'GOOGL': 'Alphabet Inc. (Class A)',
+    'GOOG': 'Alphabet Inc. (Class C)',
+    'MSFT': 'Microsoft Corporation',
+    'AMZN': 'Amazon.com Inc.',
+    'META': 'Meta Platforms Inc.',
+    'TSLA': 'Tesla Inc.',
+    'NVDA': 'NVIDIA Corporation',
+    'JPM': 'JPMorgan Chase & Co.',
+    'V': 'Visa Inc.',
+    'JNJ': 'Johnson & Johnson',
+    'WMT': 'Walmart Inc.',
+    'MA': 'Mastercard Inc.',
+    'PG': 'Procter & Gamble',
+    'UNH': 'UnitedHealth Group',
+    'HD': 'The Home Depot',
+    'DIS': 'The Walt Disney Company',
+    'BAC': 'Bank of America',
+    'XOM': 'Exxon Mobil',
+    'CVX': 'Chevron Corporation',
+    'ABBV': 'AbbVie Inc.',
+    'PFE': 'Pfizer Inc.',
+    'AVGO': 'Broadcom Inc.',
+    'COST': 'Costco Wholesale',
+    'MRK': 'Merck & Co.',
+    'ABT': 'Abbott Laboratories',
+    'TMO': 'Thermo Fisher Scientific',
+    'ACN': 'Accenture',
+    'CSCO': 'Cisco Systems',
+    'NFLX': 'Netflix Inc.',
+    'AMD': 'Advanced Micro Devices',
+    'INTC': 'Intel Corporation',
+    'CMCSA': 'Comcast Corporation',
+    'ADBE': 'Adobe Inc.',
+    'NKE': 'Nike Inc.',
+    'TXN': 'Texas Instruments',
+    'QCOM': 'Qualcomm Inc.',
+    'HON': 'Honeywell International',
+    'AMGN': 'Amgen Inc.',
+    'SBUX': 'Starbucks Corporation',
+    'GILD': 'Gilead Sciences',
+    'MDT': 'Medtronic',
+    'ISRG': 'Intuitive Surgical',
+    'VZ': 'Verizon Communications',
+    'LMT': 'Lockheed Martin',
+    'RTX': 'Raytheon Technologies',
+    'UPS': 'United Parcel Service',
+    'BMY': 'Bristol-Myers Squibb',
+    'PM': 'Philip Morris International',
+    'T': 'AT&T Inc.',
+    'DE': 'Deere & Company',
+    'CAT': 'Caterpillar Inc.',
+    'GS': 'Goldman Sachs',
+    'MS': 'Morgan Stanley',
+    'BLK': 'BlackRock',
+    'AXP': 'American Express',
+    'SPGI': 'S&P Global',
+    'INTU': 'Intuit Inc.',
+    'BKNG': 'Booking Holdings',
+    'ADI': 'Analog Devices',
+    'AMAT': 'Applied Materials',
+    'KLAC': 'KLA Corporation',
+    'LRCX': 'Lam Research',
+    'CDNS': 'Cadence Design Systems',
+    'SNPS': 'Synopsys',
+    'CRWD': 'CrowdStrike',
+    'PANW': 'Palo Alto Networks',
+    'FTNT': 'Fortinet',
+    'ZS': 'Zscaler',
+    'NET': 'Cloudflare',
+    'DDOG': 'Datadog',
+    'MDB': 'MongoDB',
+    'NOW': 'ServiceNow',
+    'TEAM': 'Atlassian',
+    'WDAY': 'Workday',
+    'VEEV': 'Veeva Systems',
+    'ZM': 'Zoom Video Communications',
+    'DOCN': 'DigitalOcean',
+    'GTLB': 'GitLab',
+    'ESTC': 'Elastic',
+    'FROG': 'JFrog',
+    'PATH': 'UiPath',
+    'BILL': 'Bill.com',
+    'COUP': 'Coupa Software',
+    'OKTA': 'Okta',
+    'SPLK': 'Splunk',
+    'QLYS': 'Qualys',
+    'RPD': 'Rapid7',
+    'TENB': 'Tenable',
+    'VRNS': 'Varonis Systems',
+    'RDWR': 'Radware',
+    'CHKP': 'Check Point Software',
+    'QLYS': 'Qualys',
+    'RDWR': 'Radware',
+    'CHKP': 'Check Point Software',
+    'FTNT': 'Fortinet',
+    'ZS': 'Zscaler',
+    'NET': 'Cloudflare',
+    'DDOG': 'Datadog',
+    'MDB': 'MongoDB',
+    'NOW': 'ServiceNow',
+    'TEAM': 'Atlassian',
+    'WDAY': 'Workday',
+    'VEEV': 'Veeva Systems',
+    'ZM': 'Zoom Video Communications',
+    'DOCN': 'DigitalOcean',
+    'GTLB': 'GitLab',
+    'ESTC': 'Elastic',
+    'FROG': 'JFrog',
+    'PATH': 'UiPath',
+    'BILL': 'Bill.com',
+    'COUP': 'Coupa Software',
+    'OKTA': 'Okta',
+    'SPLK': 'Splunk',
+    'QLYS': 'Qualys',
+    'RPD': 'Rapid7',
+    'TENB': 'Tenable',
+    'VRNS': 'Varonis Systems',
+    'RDWR': 'Radware',
+    'CHKP': 'Check Point Software',
+    # European Stocks
+    'NVO': 'Novo Nordisk A/S',
+    'NVO.CO': 'Novo Nordisk A/S (Copenhagen)',
+    'ASML': 'ASML Holding N.V.',
+    'ASML.AS': 'ASML Holding (Amsterdam)',
+    'SAP': 'SAP SE',
+    'SAP.DE': 'SAP SE (Germany)',
+    'SHEL': 'Shell plc',
+    'SHEL.L': 'Shell plc (London)',
+    'BP': 'BP p.l.c.',
+    'BP.L': 'BP p.l.c. (London)',
+    'GSK': 'GSK plc',
+    'GSK.L': 'GSK plc (London)',
+    'AZN': 'AstraZeneca',
+    'AZN.L': 'AstraZeneca (London)',
+    'UL': 'Unilever',
+    'ULVR.L': 'Unilever (London)',
+    'DEO': 'Diageo',
+    'DEO.L': 'Diageo (London)',
+    'RDS-A': 'Royal Dutch Shell',
+    'RDS-B': 'Royal Dutch Shell',
+    'BTI': 'British American Tobacco',
+    'BTI.L': 'British American Tobacco (London)',
+    'RIO': 'Rio Tinto',
+    'RIO.L': 'Rio Tinto (London)',
+    'BHP': 'BHP Group',
+    'BHP.L': 'BHP Group (London)',
+    'GLEN.L': 'Glencore (London)',
+    'NG': 'National Grid',
+    'NG.L': 'National Grid (London)',
+    'VOD': 'Vodafone',
+    'VOD.L': 'Vodafone (London)',
+    'TSCO.L': 'Tesco (London)',
+    'SBRY.L': 'Sainsbury\'s (London)',
+    'MKS.L': 'Marks & Spencer (London)',
+    'NXT.L': 'Next (London)',
+    'JD.L': 'JD Sports (London)',
+    'FRES.L': 'Fresnillo (London)',
+    'POLY.L': 'Polymetal (London)',
+    'AAL.L': 'Anglo American (London)',
+    'ANTO.L': 'Antofagasta (London)',
+    'EVR.L': 'Evercore (London)',
+    'FERG.L': 'Ferguson (London)',
+    'FOUR.L': '4imprint (London)',
+    'GFTU.L': 'Grafton (London)',
+    'HWDN.L': 'Howden Joinery (London)',
+    'IHG.L': 'InterContinental Hotels (London)',
+    'JD.L': 'JD Sports Fashion (London)',
+    'KGF.L': 'Kingfisher (London)',
+    'LAND.L': 'Land Securities (London)',
+    'LGEN.L': 'Legal & General (London)',
+    'LLOY.L': 'Lloyds Banking (London)',
+    'MKS.L': 'Marks & Spencer (London)',
+    'NXT.L': 'Next (London)',
+    'OCDO.L': 'Ocado (London)',
+    'PSN.L': 'Persimmon (London)',
+    'RTO.L': 'Rentokil Initial (London)',
+    'SBRY.L': 'Sainsbury\'s (London)',
+    'SGE.L': 'Sage Group (London)',
+    'SGRO.L': 'Segro (London)',
+    'SN.L': 'Smith & Nephew (London)',
+    'SPX.L': 'Spirax-Sarco Engineering (London)',
+    'SSE.L': 'SSE (London)',
+    'STAN.L': 'Standard Chartered (London)',
+    'STJ.L': 'St. James\'s Place (London)',
+    'SVT.L': 'Severn Trent (London)',
+    'TSCO.L': 'Tesco (London)',
+    'TW.L': 'Taylor Wimpey (London)',
+    'ULVR.L': 'Unilever (London)',
+    'VOD.L': 'Vodafone (London)',
+    'WEIR.L': 'Weir Group (London)',
+    'WTB.L': 'Whitbread (London)',
+    # Asian Stocks
+    'TSM': 'Taiwan Semiconductor',
+    'TSM.TW': 'Taiwan Semiconductor (Taiwan)',
+    'BABA': 'Alibaba Group',
+    'BABA.HK': 'Alibaba Group (Hong Kong)',
+    'JD': 'JD.com',
+    'JD.HK': 'JD.com (Hong Kong)',
+    'PDD': 'Pinduoduo',
+    'PDD.HK': 'Pinduoduo (Hong Kong)',
+    'BIDU': 'Baidu',
+    'BIDU.HK': 'Baidu (Hong Kong)',
+    'NIO': 'NIO Inc.',
+    'NIO.HK': 'NIO Inc. (Hong Kong)',
+    'XPEV': 'XPeng',
+    'XPEV.HK': 'XPeng (Hong Kong)',
+    'LI': 'Li Auto',
+    'LI.HK': 'Li Auto (Hong Kong)',
+    'TME': 'Tencent Music',
+    'TME.HK': 'Tencent Music (Hong Kong)',
+    'NTES': 'NetEase',
+    'NTES.HK': 'NetEase (Hong Kong)',
+    'WB': 'Weibo',
+    'WB.HK': 'Weibo (Hong Kong)',
+    'DOYU': 'DouYu',
+    'DOYU.HK': 'DouYu (Hong Kong)',
+    'HUYA': 'Huya',
+    'HUYA.HK': 'Huya (Hong Kong)',
+    'YY': 'YY Inc.',
+    'YY.HK': 'YY Inc. (Hong Kong)',
+    'VIPS': 'Vipshop',
+    'VIPS.HK': 'Vipshop (Hong Kong)',
+    'WB': 'Weibo',
+    'WB.HK': 'Weibo (Hong Kong)',
+    # Canadian Stocks
+    'SHOP': 'Shopify',
+    'SHOP.TO': 'Shopify (Toronto)',
+    'RY': 'Royal Bank of Canada',
+    'RY.TO': 'Royal Bank of Canada (Toronto)',
+    'TD': 'TD Bank',
+    'TD.TO': 'TD Bank (Toronto)',
+    'BNS': 'Bank of Nova Scotia',
+    'BNS.TO': 'Bank of Nova Scotia (Toronto)',
+    'BMO': 'Bank of Montreal',
+    'BMO.TO': 'Bank of Montreal (Toronto)',
+    'CM': 'Canadian Imperial Bank',
+    'CM.TO': 'Canadian Imperial Bank (Toronto)',
+    'ENB': 'Enbridge',
+    'ENB.TO': 'Enbridge (Toronto)',
+    'TRP': 'TC Energy',
+    'TRP.TO': 'TC Energy (Toronto)',
+    'CP': 'Canadian Pacific',
+    'CP.TO': 'Canadian Pacific (Toronto)',
+    'CNR': 'Canadian National Railway',
+    'CNR.TO': 'Canadian National Railway (Toronto)',
+    'ATD': 'Alimentation Couche-Tard',
+    'ATD.TO': 'Alimentation Couche-Tard (Toronto)',
+    'WCN': 'Waste Connections',
+    'WCN.TO': 'Waste Connections (Toronto)',
+    'FNV': 'Franco-Nevada',
+    'FNV.TO': 'Franco-Nevada (Toronto)',
+    'WPM': 'Wheaton Precious Metals',
+    'WPM.TO': 'Wheaton Precious Metals (Toronto)',
+    'NTR': 'Nutrien',
+    'NTR.TO': 'Nutrien (Toronto)',
+    'SU': 'Suncor Energy',
+    'SU.TO': 'Suncor Energy (Toronto)',
+    'IMO': 'Imperial Oil',
+    'IMO.TO': 'Imperial Oil (Toronto)',
+    'CVE': 'Cenovus Energy',
+    'CVE.TO': 'Cenovus Energy (Toronto)',
+    'MEG': 'MEG Energy',
+    'MEG.TO': 'MEG Energy (Toronto)',
+    'TOU': 'Tourmaline Oil',
+    'TOU.TO': 'Tourmaline Oil (Toronto)',
+    'ARX': 'ARC Resources',
+    'ARX.TO': 'ARC Resources (Toronto)',
+    'PPL': 'Pembina Pipeline',
+    'PPL.TO': 'Pembina Pipeline (Toronto)',
+    'KEY': 'Keyera',
+    'KEY.TO': 'Keyera (Toronto)',
+    'IPL': 'Inter Pipeline',
+    'IPL.TO': 'Inter Pipeline (Toronto)',
+    'PXT': 'Parex Resources',
+    'PXT.TO': 'Parex Resources (Toronto)',
+    'VET': 'Vermilion Energy',
+    'VET.TO': 'Vermilion Energy (Toronto)',
+    'BAY': 'Baytex Energy',
+    'BAY.TO': 'Baytex Energy (Toronto)',
+    'CR': 'Crew Energy',
+    'CR.TO': 'Crew Energy (Toronto)',
+    'GTE': 'Gran Tierra Energy',
+    'GTE.TO': 'Gran Tierra Energy (Toronto)',
+    'TVE': 'Tamarack Valley Energy',
+    'TVE.TO': 'Tamarack Valley Energy (Toronto)',
+    'WCP': 'Whitecap Resources',
+    'WCP.TO': 'Whitecap Resources (Toronto)',
+    'TOU': 'Tourmaline Oil',
+    'TOU.TO': 'Tourmaline Oil (Toronto)',
+    'ARX': 'ARC Resources',
+    'ARX.TO': 'ARC Resources (Toronto)',
+    'PPL': 'Pembina Pipeline',
+    'PPL.TO': 'Pembina Pipeline (Toronto)',
+    'KEY': 'Keyera',
+    'KEY.TO': 'Keyera (Toronto)',
+    'IPL': 'Inter Pipeline',
+    'IPL.TO': 'Inter Pipeline (Toronto)',
+    'PXT': 'Parex Resources',
+    'PXT.TO': 'Parex Resources (Toronto)',
+    'VET': 'Vermilion Energy',
+    'VET.TO': 'Vermilion Energy (Toronto)',
+    'BAY': 'Baytex Energy',
+    'BAY.TO': 'Baytex Energy (Toronto)',
+    'CR': 'Crew Energy',
+    'CR.TO': 'Crew Energy (Toronto)',
+    'GTE': 'Gran Tierra Energy',
+    'GTE.TO': 'Gran Tierra Energy (Toronto)',
+    'TVE': 'Tamarack Valley Energy',
+    'TVE.TO': 'Tamarack Valley Energy (Toronto)',
+    'WCP': 'Whitecap Resources',
+    'WCP.TO': 'Whitecap Resources (Toronto)',
+}